@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+A local stand-in for Yumpu API, serving the documented shapes of the
+responses for generated documents, hotspots, collections and sections, with
+configurable latency and error injection. It's meant for the benchmarks,
+not for testing the behaviour of the real API.
+
+Run it alone with::
+
+    python benchmarks/fake_server.py --port 8080 --latency 0.02 --errors 0.01
+
+and point a client at it::
+
+    Yumpu('token', base_url='http://127.0.0.1:8080/2.0',
+          search_url='http://127.0.0.1:8080/search/2.0')
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qsl, urlsplit
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qsl, urlsplit
+
+
+WORDS = ['garden', 'kitchen', 'catalogue', 'spring', 'summer', 'autumn',
+         'winter', 'tools', 'furniture', 'magazine', 'brochure', 'recipes',
+         'travel', 'city', 'guide', 'fashion', 'sport', 'music']
+LANGUAGES = ['en', 'de', 'fr', 'it', 'es']
+
+
+def make_documents(count, seed=0):
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        id = 50000000 + i
+        words = rng.sample(WORDS, 4)
+        day = 1 + i % 28
+        documents.append({
+            'id': str(id),
+            'create_date': '2015-08-%02d 10:%02d:00' % (day, i % 60),
+            'update_date': '2015-09-%02d 10:%02d:00' % (day, i % 60),
+            'url': 'https://www.yumpu.com/en/document/view/%d/%s' % (
+                id, '-'.join(words[:2])),
+            'short_url': 'https://yumpu.com/s/%s' % hex(id)[2:],
+            'image': {
+                'small': 'https://img.yumpu.com/%d/1/115x163/cover.jpg' % id,
+                'medium': 'https://img.yumpu.com/%d/1/452x640/cover.jpg' % id,
+                'big': 'https://img.yumpu.com/%d/1/1129x1600/cover.jpg' % id,
+            },
+            'language': LANGUAGES[i % len(LANGUAGES)],
+            'title': ' '.join(words[:2]).title(),
+            'description': 'A %s %s about %s and %s' % tuple(words),
+            'tags': ','.join(words[2:]),
+            'access_tags': False,
+            'subscriptions': False,
+            'pages': str(10 + i % 90),
+            'width': '452',
+            'height': '640',
+            'embed_code': '<iframe width="512px" height="384px" src="https://'
+                          'www.yumpu.com/en/embed/view/%d" frameborder="0" '
+                          'allowfullscreen="true"></iframe>' % id,
+            'settings': {
+                'privacy_mode': 'public',
+                'site_download_pdf': False,
+                'site_recommended_magazines': True,
+                'site_social_sharing': True,
+                'player_branding': True,
+                'player_download_pdf': False,
+                'player_print_page': False,
+                'player_social_sharing': True,
+                'player_sidebar': False,
+                'player_html5_c2r': True,
+                'player_inner_shadow': True,
+                'player_outer_shadow': True,
+                'player_google_analytics_code': '',
+                'magazine_page_teaser': False,
+                'magazine_page_teaser_url': '',
+                'magazine_page_teaser_page_range': '',
+                'magazine_page_teaser_image_url': '',
+                'magazine_premium_blurred': False,
+                'magazine_premium_blurred_page_range': '',
+                'date_validity_from': '',
+                'date_validity_until': '',
+                'appkiosk_iap_sale_item': False,
+                'appkiosk_itc_product_id': '',
+            },
+        })
+    return documents
+
+
+def make_hotspots(document_id, count):
+    return [{
+        'id': '%s%03d' % (document_id, i),
+        'document_id': document_id,
+        'page': 1 + i % 10,
+        'type': 'link',
+        'settings': {'x': 10 * i % 500, 'y': 20 * i % 700, 'w': 100, 'h': 40,
+                     'name': 'Hotspot %d' % i,
+                     'tooltip': 'Tooltip %d' % i,
+                     'link': 'http://www.example.com/%d' % i},
+        'create_date': '2015-08-30 19:02:16',
+        'update_date': '2015-08-30 19:02:16',
+    } for i in range(count)]
+
+
+class FakeYumpu(object):
+    """
+    The data and the behaviour of the fake API.
+
+    :param int documents: how many documents the account has
+    :param int hotspots: how many hotspots every document has
+    :param int collections: how many collections (with 3 sections each)
+    :param float latency: the seconds added to every response
+    :param float jitter: a random number of seconds up to this is added too
+    :param float errors: the part of the requests answered with a 503
+    :param float conversion_time: seconds until an upload is converted
+    """
+
+    def __init__(self, documents=1000, hotspots=20, collections=10,
+                 latency=0.0, jitter=0.0, errors=0.0, conversion_time=1.0,
+                 seed=0):
+        self.documents = make_documents(documents, seed)
+        self.by_id = dict((d['id'], d) for d in self.documents)
+        self.hotspots = hotspots
+        self.sections = {}
+        self.collections = []
+        for c in range(collections):
+            sections = []
+            for s in range(3):
+                id = 'c%ds%d' % (c, s)
+                members = self.documents[(c * 3 + s) * 5:(c * 3 + s + 1) * 5]
+                self.sections[id] = {
+                    'id': id, 'create_date': '2015-08-30 19:02:16',
+                    'update_date': '2015-08-30 19:02:16',
+                    'name': 'Section %d' % s, 'description': '',
+                    'sorting': 'document_desc', 'order': s,
+                    'documents': ','.join(d['id'] for d in members),
+                }
+                sections.append({'id': id, 'name': 'Section %d' % s})
+            self.collections.append({
+                'id': 'c%d' % c, 'create_date': '2015-08-30 19:02:16',
+                'update_date': '2015-08-30 19:02:16',
+                'name': 'Collection %d' % c, 'order': c, 'sections': sections,
+            })
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = errors
+        self.conversion_time = conversion_time
+        self.uploads = {}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def delay(self):
+        delay = self.latency
+        if self.jitter:
+            with self.lock:
+                delay += self.rng.random() * self.jitter
+        if delay > 0:
+            time.sleep(delay)
+
+    def fail(self):
+        with self.lock:
+            self.requests += 1
+            return self.errors and self.rng.random() < self.errors
+
+    def page(self, records, params):
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 10))
+        return records[offset:offset + limit]
+
+    def fields(self, records, params):
+        fields = params.get('return_fields')
+        if not fields:
+            return records
+        fields = fields.split(',')
+        selected = []
+        for record in records:
+            # The image_* return fields are the sizes of the image dict.
+            result = dict((f, record[f]) for f in fields if f in record)
+            sizes = [f[len('image_'):] for f in fields
+                     if f.startswith('image_')]
+            if sizes and 'image' in record:
+                result['image'] = dict((size, record['image'][size])
+                                       for size in sizes
+                                       if size in record['image'])
+            selected.append(result)
+        return selected
+
+    def search(self, params):
+        words = params.get('q', '').lower().split()
+        test = all if params.get('op') == 'and' else any
+
+        def match(text):
+            return test(w in text for w in words)
+        found = [d for d in self.documents if match(
+            ' '.join((d['title'], d['description'], d['tags'])).lower())]
+        if params.get('language'):
+            found = [d for d in found if d['language'] == params['language']]
+        return found
+
+    def handle(self, method, path, params):
+        """
+        :returns: a ``(status, response)`` tuple
+        """
+        self.delay()
+        if self.fail():
+            return 503, {'state': 'error',
+                         'errors': ['Service temporarily unavailable']}
+        entry_point = path.split('/2.0', 1)[-1]
+        if method == 'GET':
+            return 200, self.get(entry_point, params)
+        if method == 'POST' and entry_point in ('/document/file.json',
+                                                '/document/url.json'):
+            with self.lock:
+                id = 'p%d' % len(self.uploads)
+                self.uploads[id] = time.time()
+            return 200, {'state': 'success', 'progress_id': id}
+        return 200, {'state': 'success'}
+
+    def get(self, entry_point, params):
+        if entry_point == '/documents.json':
+            return {'state': 'success', 'total': len(self.documents),
+                    'documents': self.fields(
+                        self.page(self.documents, params), params)}
+        if entry_point == '/document.json':
+            document = self.by_id.get(params.get('id'))
+            if document is None:
+                return {'state': 'error', 'errors': ['Document not found']}
+            return {'state': 'success',
+                    'document': self.fields([document], params)}
+        if entry_point == '/document/hotspots.json':
+            hotspots = make_hotspots(params.get('id'), self.hotspots)
+            return {'state': 'success', 'total': len(hotspots),
+                    'hotspots': self.fields(self.page(hotspots, params),
+                                            params)}
+        if entry_point == '/document/hotspot.json':
+            id = params.get('id', '')
+            hotspot = make_hotspots(id[:-3], int(id[-3:]) + 1)[-1:]
+            return {'state': 'success', 'hotspot': hotspot}
+        if entry_point == '/collections.json':
+            return {'state': 'success', 'total': len(self.collections),
+                    'collections': self.fields(
+                        self.page(self.collections, params), params)}
+        if entry_point == '/collection.json':
+            found = [c for c in self.collections if c['id'] == params.get('id')]
+            return {'state': 'success', 'collection': self.fields(found,
+                                                                  params)}
+        if entry_point == '/collection/section.json':
+            section = self.sections.get(params.get('id'))
+            return {'state': 'success',
+                    'section': self.fields([section] if section else [],
+                                           params)}
+        if entry_point == '/search.json':
+            found = self.search(params)
+            return {'state': 'success', 'total': len(found),
+                    'documents': self.fields(self.page(found, params),
+                                             params)}
+        if entry_point == '/document/progess.json':
+            started = self.uploads.get(params.get('id'))
+            if started is None:
+                return {'state': 'error', 'errors': ['Progress not found']}
+            progress = min(100, int(100 * (time.time() - started) /
+                                    max(self.conversion_time, 1e-6)))
+            document = {'id': '', 'progress': progress}
+            if progress >= 100:
+                document = {'id': self.documents[0]['id'], 'progress': 100}
+            return {'state': 'success', 'document': document}
+        return {'state': 'success'}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # The headers and the body are written separately: without this, the
+    # delayed ACKs of the client add 40ms to every response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_chunked(self):
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b';')[0], 16)
+            if not size:
+                # The trailers, if any, end with an empty line.
+                while self.rfile.readline().strip():
+                    pass
+                return b''.join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def respond(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = self.read_chunked()
+        else:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+        content_type = self.headers.get('Content-Type') or ''
+        if body and content_type.startswith(
+                'application/x-www-form-urlencoded'):
+            params.update(parse_qsl(body.decode('utf-8')))
+        started = time.time()
+        status, response = self.server.api.handle(self.command, url.path,
+                                                  params)
+        response = dict(response, completed_in='%.4f' % (
+            time.time() - started))
+        data = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if status == 503:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = respond
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, api, host='127.0.0.1', port=0):
+        HTTPServer.__init__(self, (host, port), Handler)
+        self.api = api
+
+    @property
+    def url(self):
+        return 'http://%s:%d/2.0' % self.server_address[:2]
+
+    @property
+    def search_url(self):
+        # Apart from the base url, as the client tells the search results
+        # from the other responses by their url.
+        return 'http://%s:%d/search/2.0' % self.server_address[:2]
+
+
+def start(api=None, host='127.0.0.1', port=0):
+    """
+    Start a fake server in a background thread.
+
+    :param api: a :class:`FakeYumpu`, one with the default settings if not given
+    :returns: the server; its ``url`` and ``search_url`` are the urls to give to the client
+    """
+    server = Server(api or FakeYumpu(), host, port)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--documents', type=int, default=1000)
+    parser.add_argument('--hotspots', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='random seconds added to every response, at most')
+    parser.add_argument('--errors', type=float, default=0.0,
+                        help='the part of the requests failing with a 503')
+    args = parser.parse_args()
+    api = FakeYumpu(args.documents, args.hotspots, latency=args.latency,
+                    jitter=args.jitter, errors=args.errors)
+    server = Server(api, args.host, args.port)
+    print('Serving a fake Yumpu API on %s (search on %s)' % (
+        server.url, server.search_url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the SDK against the local fake Yumpu API: throughput, latency
+percentiles and memory of the sync client, the batch helpers and the
+pagination paths.
+
+    python benchmarks/run.py --latency 0.01 --json results.json
+    python benchmarks/run.py --latency 0.01 --compare results.json
+
+Run it before and after a change to see regressions in numbers. Only the
+relative numbers of runs on the same machine and settings are meaningful.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from fake_server import FakeYumpu, start  # noqa: E402
+from yumpu_sdk.api import Yumpu  # noqa: E402
+from yumpu_sdk.retry import RetryPolicy  # noqa: E402
+from yumpu_sdk.sync import DOCUMENT_FIELDS  # noqa: E402
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(q / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def measure(scenario, client, settings, memory=False):
+    """
+    Run a scenario and collect its numbers. The latencies are the ones of
+    the requests, as seen by the hooks of the client.
+    """
+    latencies = []
+    client.hooks.after_response.append(
+        lambda event: latencies.append(event.duration))
+    gc.collect()
+    if memory:
+        tracemalloc.start()
+    started = time.time()
+    operations = scenario(client, settings)
+    elapsed = time.time() - started
+    result = {
+        'operations': operations,
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'throughput': operations / elapsed if elapsed else None,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'peak_kib': None,
+    }
+    if memory:
+        result['peak_kib'] = tracemalloc.get_traced_memory()[1] / 1024.0
+        tracemalloc.stop()
+    return result
+
+
+def ms(value):
+    return None if value is None else value * 1000
+
+
+def document_ids(settings):
+    return [str(50000000 + i) for i in range(settings.requests)]
+
+
+def document_get(client, settings):
+    for id in document_ids(settings):
+        client.document_get(id, DOCUMENT_FIELDS)
+    return settings.requests
+
+
+def document_get_many(concurrency):
+    def scenario(client, settings):
+        results = client.document_get_many(document_ids(settings),
+                                           DOCUMENT_FIELDS, concurrency)
+        return len(results)
+    return scenario
+
+
+def iter_documents(prefetch):
+    def scenario(client, settings):
+        count = 0
+        for document in client.iter_documents(return_fields=DOCUMENT_FIELDS,
+                                              prefetch=prefetch):
+            count += 1
+        return count
+    return scenario
+
+
+def iter_hotspots(client, settings):
+    count = 0
+    for id in document_ids(settings)[:10]:
+        for hotspot in client.iter_hotspots(id):
+            count += 1
+    return count
+
+
+def iter_search(client, settings):
+    count = 0
+    for document in client.iter_search('garden', prefetch=True):
+        count += 1
+    return count
+
+
+def search(client, settings):
+    for i in range(settings.requests):
+        client.search('garden tools', limit=20)
+    return settings.requests
+
+
+def wait_for_documents(client, settings):
+    # Uploads are not retried, the ones failing with an injected error are
+    # left out.
+    responses = [client.document_post_url(
+        title='Catalogue %d' % i, url='http://www.example.com/%d.pdf' % i)
+        for i in range(settings.requests)]
+    ids = [r['progress_id'] for r in responses if 'progress_id' in r]
+    finished = list(client.wait_for_documents(ids, timeout=60,
+                                              min_interval=0.1))
+    return len(finished)
+
+
+SCENARIOS = [
+    ('document_get', document_get, {}),
+    ('document_get_many x8', document_get_many(8), {}),
+    ('document_get_many x32', document_get_many(32), {'pool_maxsize': 32}),
+    ('iter_documents', iter_documents(False), {}),
+    ('iter_documents prefetch', iter_documents(True), {}),
+    ('iter_documents models', iter_documents(True), {'models': True}),
+    ('iter_hotspots', iter_hotspots, {}),
+    ('search', search, {}),
+    ('iter_search prefetch', iter_search, {}),
+    ('wait_for_documents', wait_for_documents, {}),
+]
+
+
+def report(results, baseline=None):
+    lines = ['%-26s %7s %7s %9s %10s %8s %8s %8s %10s' % (
+        'scenario', 'ops', 'reqs', 'seconds', 'ops/s', 'p50 ms', 'p95 ms',
+        'p99 ms', 'peak KiB')]
+    for name, _, _ in SCENARIOS:
+        result = results.get(name)
+        if result is None:
+            continue
+        line = '%-26s %7d %7d %9.3f %10.1f %8s %8s %8s %10s' % (
+            name, result['operations'], result['requests'],
+            result['seconds'], result['throughput'] or 0,
+            fmt(result['p50_ms']), fmt(result['p95_ms']),
+            fmt(result['p99_ms']), fmt(result['peak_kib'], '%.0f'))
+        if baseline and name in baseline and baseline[name]['seconds']:
+            line += '  %+.0f%% time' % (100.0 * (
+                result['seconds'] / baseline[name]['seconds'] - 1))
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def fmt(value, format='%.2f'):
+    return '-' if value is None else format % value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='the number of calls of the per call scenarios')
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--errors', type=float, default=0.0)
+    parser.add_argument('--memory', action='store_true',
+                        help='measure the peak of memory (slows the runs)')
+    parser.add_argument('--only', action='append',
+                        help='run only the scenarios starting with this name')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='compare with the results in this '
+                                          'file')
+    args = parser.parse_args()
+
+    api = FakeYumpu(args.documents, latency=args.latency, jitter=args.jitter,
+                    errors=args.errors, conversion_time=0.5)
+    server = start(api)
+    results = {}
+    try:
+        for name, scenario, options in SCENARIOS:
+            if args.only and not any(name.startswith(o) for o in args.only):
+                continue
+            client = Yumpu('benchmark', base_url=server.url,
+                           search_url=server.search_url,
+                           retry=RetryPolicy(backoff_factor=0.01), **options)
+            with client:
+                results[name] = measure(scenario, client, args, args.memory)
+    finally:
+        server.shutdown()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print(report(results, baseline))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f,
+                      indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -73,7 +73,14 @@ setup(
     # your project is installed. For an analysis of "install_requires" vs pip's
     # requirements files see:
     # https://packaging.python.org/en/latest/requirements.html
-    install_requires=['requests'],
+    install_requires=['requests', 'futures; python_version < "3"'],
+
+    # Optional features, installed with e.g. "pip install yumpu-sdk[async]".
+    extras_require={
+        'async': ['aiohttp'],
+        'fast': ['orjson; python_version >= "3.8"',
+                 'ujson; python_version < "3.8"'],
+    },
 
     # To provide executable scripts, use entry points in preference to the
     # "scripts" keyword. Entry points provide cross-platform support and allow
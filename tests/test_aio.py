@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'benchmarks'))
+
+from fake_server import FakeYumpu, start  # noqa: E402
+from yumpu_sdk.multipart import UploadStats  # noqa: E402
+
+try:
+    from yumpu_sdk.aio import AsyncYumpu
+except ImportError:
+    AsyncYumpu = None
+
+
+@unittest.skipIf(AsyncYumpu is None, 'aiohttp is not installed')
+class AsyncYumpuTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = start(FakeYumpu(10, conversion_time=0.1))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def run_client(self, coroutine_function):
+        async def main():
+            async with AsyncYumpu('token', base_url=self.server.url,
+                                  search_url=self.server.search_url) as yumpu:
+                return await coroutine_function(yumpu)
+        return asyncio.run(main())
+
+    def test_document_post_file_reports_progress(self):
+        content = b'%PDF-1.4\n' + b'x' * 200000
+        progress = []
+        stats = UploadStats()
+
+        def upload(yumpu):
+            return yumpu.document_post_file(
+                title='hello', filename=content,
+                progress_callback=lambda sent, total: progress.append(
+                    (sent, total)),
+                upload_stats=stats)
+        response = self.run_client(upload)
+        self.assertEqual(response['state'], 'success')
+        self.assertTrue(response['progress_id'])
+        total = progress[-1][1]
+        self.assertGreater(total, len(content))
+        self.assertEqual(progress[-1][0], total)
+        self.assertEqual(stats.bytes_sent, total)
+        self.assertIsNotNone(stats.time_to_first_byte)
+
+    def test_wait_for_documents(self):
+        async def wait(yumpu):
+            ids = []
+            for i in range(3):
+                response = await yumpu.document_post_url(
+                    title='Catalogue %d' % i,
+                    url='http://www.example.com/%d.pdf' % i)
+                ids.append(response['progress_id'])
+            finished = []
+            async for progress_id, response in yumpu.wait_for_documents(
+                    ids, timeout=10, min_interval=0.05):
+                finished.append(progress_id)
+            return ids, finished
+        ids, finished = self.run_client(wait)
+        self.assertEqual(sorted(finished), sorted(ids))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from yumpu_sdk.api import BASE_URL, Yumpu
+from yumpu_sdk.cache import ResponseCache
+from yumpu_sdk.transport import ReplayTransport, request_key
+
+
+class CountingTransport(ReplayTransport):
+    """
+    Replays a cassette, remembering the requests it is sent.
+    """
+
+    def __init__(self, path):
+        super(CountingTransport, self).__init__(path)
+        self.sent = []
+
+    def send(self, session, method, url, **kwargs):
+        self.sent.append((method, url, kwargs.get('headers') or {}))
+        return super(CountingTransport, self).send(session, method, url,
+                                                   **kwargs)
+
+
+def success(**records):
+    return json.dumps(dict(records, state='success'))
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cassette.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def client(self, exchanges, ttl=300):
+        with open(self.path, 'w') as f:
+            for exchange in exchanges:
+                f.write(json.dumps(exchange) + '\n')
+        self.transport = CountingTransport(self.path)
+        self.cache = ResponseCache(ttl=ttl)
+        return Yumpu('token', transport=self.transport,
+                     response_cache=self.cache)
+
+    def test_revalidates_expired_responses(self):
+        key = request_key('GET', BASE_URL + '/document.json',
+                          params={'id': 1})
+        yumpu = self.client([
+            {'k': key, 's': 200, 'h': {'ETag': '"v1"'},
+             'b': success(document=[{'id': '1', 'title': 'One'}])},
+            {'k': key, 's': 304, 'h': {'ETag': '"v1"'}, 'b': ''},
+        ], ttl=0)
+        first = yumpu.document_get(1)
+        second = yumpu.document_get(1)
+        self.assertEqual(second, first)
+        self.assertEqual(self.transport.sent[1][2]['If-None-Match'], '"v1"')
+        self.assertEqual(self.cache.revalidations, 1)
+
+    def test_serves_fresh_responses_without_requests(self):
+        key = request_key('GET', BASE_URL + '/document.json',
+                          params={'id': 1})
+        yumpu = self.client([
+            {'k': key, 's': 200, 'b': success(document=[{'id': '1'}])},
+        ])
+        yumpu.document_get(1)
+        yumpu.document_get(1)
+        self.assertEqual(len(self.transport.sent), 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def section_exchanges(self, *ids):
+        return [{'k': request_key('GET', BASE_URL + '/collection/section.json',
+                                  params={'id': id}),
+                 's': 200, 'b': success(section=[{'id': id}])}
+                for id in ids]
+
+    def test_invalidates_only_the_changed_section(self):
+        delete = request_key('DELETE',
+                             BASE_URL + '/collection/section/document.json',
+                             data={'id': 'S9', 'documents': '1,2'})
+        yumpu = self.client(self.section_exchanges('S1', 'S9') + [
+            {'k': delete, 's': 200, 'b': success()},
+        ])
+        yumpu.section_get('S1')
+        yumpu.section_get('S9')
+        yumpu.section_document_delete('S9', ['1', '2'])
+        yumpu.section_get('S1')
+        yumpu.section_get('S9')
+        self.assertEqual(
+            [url.rsplit('/', 1)[1] for method, url, headers in
+             self.transport.sent],
+            ['section.json', 'section.json', 'document.json',
+             'section.json'])
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_deleting_a_document_invalidates_the_sections(self):
+        delete = request_key('DELETE', BASE_URL + '/document.json',
+                             data={'id': '1'})
+        yumpu = self.client(self.section_exchanges('S1') + [
+            {'k': delete, 's': 200, 'b': success()},
+        ])
+        yumpu.section_get('S1')
+        yumpu.document_delete('1')
+        yumpu.section_get('S1')
+        self.assertEqual(len(self.transport.sent), 3)
+        self.assertEqual(self.cache.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
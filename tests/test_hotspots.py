@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from yumpu_sdk.hotspots import CREATE, UPDATE, import_hotspots, \
+    plan_hotspots
+
+
+def hotspot(**settings):
+    row = {'id': '10', 'document_id': 'NEW', 'page': '1', 'type': 'video',
+           'x': '30', 'y': '40', 'w': '100', 'h': '50', 'name': 'Intro',
+           'source': 'vimeo', 'source_id': '76979871'}
+    row.update(settings)
+    return row
+
+
+class PlanHotspotsTestCase(unittest.TestCase):
+
+    def test_creates_on_the_reconciled_document(self):
+        changes, unchanged = plan_hotspots(
+            [], [hotspot(id=None, document_id='OLD')], 'NEW')
+        self.assertEqual(unchanged, 0)
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]['action'], CREATE)
+        self.assertEqual(changes[0]['document_id'], 'NEW')
+
+    def test_compares_positions_as_numbers(self):
+        changes, unchanged = plan_hotspots(
+            [hotspot()], [hotspot(id=None, x=30, y=40.0, w='100.0')], 'NEW')
+        self.assertEqual((changes, unchanged), ([], 1))
+
+    def test_compares_other_settings_exactly(self):
+        changes, unchanged = plan_hotspots(
+            [hotspot()], [hotspot(source_id='76979872')], 'NEW')
+        self.assertEqual(unchanged, 0)
+        self.assertEqual([(row['action'], row['id'], row['source_id'])
+                          for row in changes],
+                         [(UPDATE, '10', '76979872')])
+
+
+class RecordingYumpu(object):
+    """
+    Remembers the hotspots it is asked to create.
+    """
+
+    def __init__(self):
+        self.posted = []
+
+    def document_hotspot_post(self, document_id, *args):
+        self.posted.append(document_id)
+        return {'state': 'success'}
+
+
+class ImportHotspotsTestCase(unittest.TestCase):
+
+    def test_creates_on_the_given_document(self):
+        yumpu = RecordingYumpu()
+        rows = [hotspot(id=None, document_id='OLD'), hotspot(id=None)]
+        results = list(import_hotspots(yumpu, rows, 'TARGET'))
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(yumpu.posted, ['TARGET', 'TARGET'])
+
+    def test_creates_on_the_document_of_the_rows(self):
+        yumpu = RecordingYumpu()
+        list(import_hotspots(yumpu, [hotspot(id=None, document_id='OLD')]))
+        self.assertEqual(yumpu.posted, ['OLD'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from yumpu_sdk.models import Document, plain, wrap
+
+
+class WrapTestCase(unittest.TestCase):
+
+    def test_records_are_wrapped_when_read(self):
+        response = wrap({'state': 'success',
+                         'documents': [{'id': '1', 'title': 'One'},
+                                       {'id': '2', 'title': 'Two'}]})
+        documents = response['documents']
+        self.assertIs(type(list.__getitem__(documents, 0)), dict)
+        self.assertIsInstance(documents[0], Document)
+        self.assertIs(documents[0], documents[0])
+        self.assertIs(type(list.__getitem__(documents, 1)), dict)
+        self.assertEqual([d.title for d in documents], ['One', 'Two'])
+        self.assertEqual(json.loads(json.dumps(response, default=plain)),
+                         {'state': 'success',
+                          'documents': [{'id': '1', 'title': 'One'},
+                                        {'id': '2', 'title': 'Two'}]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import requests
+
+from yumpu_sdk.multipart import ChunkedBody, MultipartEncoder
+
+
+PDF = b'%PDF-1.4 ' + b'x' * 200000
+
+
+class Pipe(object):
+    """
+    A stream that can only be read, like a pipe or a socket.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, size=-1):
+        if size < 0:
+            size = len(self.data)
+        data, self.data = self.data[:size], self.data[size:]
+        return data
+
+
+class MultipartEncoderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def prepare(self, source):
+        encoder = MultipartEncoder({'title': 'My catalogue'},
+                                   {'file': source})
+        request = requests.Request(
+            'POST', 'http://api.yumpu.com/2.0/document/file.json',
+            data=encoder.body,
+            headers={'Content-Type': encoder.content_type}).prepare()
+        return encoder, request
+
+    def assert_uploads(self, source, filename):
+        encoder, request = self.prepare(source)
+        body = b''.join(encoder)
+        encoder.close()
+        self.assertIn(PDF, body)
+        self.assertIn(b'filename="' + filename + b'"', body)
+        self.assertIn(b'My catalogue', body)
+        return body, request
+
+    def test_path(self):
+        path = os.path.join(self.directory, 'catalogue.pdf')
+        with open(path, 'wb') as f:
+            f.write(PDF)
+        body, request = self.assert_uploads(path, b'catalogue.pdf')
+        self.assertEqual(request.headers['Content-Length'], str(len(body)))
+
+    def test_bytes(self):
+        body, request = self.assert_uploads(bytearray(PDF), b'file.pdf')
+        self.assertEqual(request.headers['Content-Length'], str(len(body)))
+
+    def test_temporary_file(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(PDF)
+            f.seek(0)
+            body, request = self.assert_uploads(f, b'file.pdf')
+        self.assertEqual(request.headers['Content-Length'], str(len(body)))
+
+    def test_non_seekable_file_is_sent_in_chunks(self):
+        encoder, request = self.prepare(Pipe(PDF))
+        self.assertIsNone(encoder.length)
+        self.assertIsInstance(request.body, ChunkedBody)
+        self.assertEqual(request.headers['Transfer-Encoding'], 'chunked')
+        self.assertNotIn('Content-Length', request.headers)
+        body = b''.join(request.body)
+        self.assertIn(PDF, body)
+        with self.assertRaises(IOError):
+            request.body.seek(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import email.utils
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import requests
+
+from yumpu_sdk.api import BASE_URL, Yumpu
+from yumpu_sdk.retry import RetryPolicy
+from yumpu_sdk.transport import ReplayTransport, request_key
+
+
+class FailingTransport(ReplayTransport):
+    """
+    Raises the given errors, then replays the cassette.
+    """
+
+    def __init__(self, path, errors):
+        super(FailingTransport, self).__init__(path)
+        self.errors = list(errors)
+        self.sent = 0
+        self.timeouts = []
+
+    def send(self, session, method, url, **kwargs):
+        self.sent += 1
+        self.timeouts.append(kwargs.get('timeout'))
+        if self.errors:
+            raise self.errors.pop(0)
+        return super(FailingTransport, self).send(session, method, url,
+                                                  **kwargs)
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+
+    def test_retries_only_idempotent_verbs(self):
+        policy = RetryPolicy(total=2)
+        self.assertTrue(policy.can_retry('get', 0))
+        self.assertTrue(policy.can_retry('DELETE', 1))
+        self.assertFalse(policy.can_retry('GET', 2))
+        self.assertFalse(policy.can_retry('POST', 0))
+        self.assertTrue(policy.can_retry('POST', 0, never_sent=True))
+        self.assertFalse(policy.can_retry('POST', 2, never_sent=True))
+
+    def test_honors_retry_after(self):
+        policy = RetryPolicy(backoff_factor=100, max_retry_after=60)
+        self.assertEqual(policy.delay(0, {'Retry-After': '7'}), 7.0)
+        date = email.utils.formatdate(time.time() + 30, usegmt=True)
+        self.assertAlmostEqual(policy.delay(0, {'Retry-After': date}), 30,
+                               delta=2)
+        self.assertIsNone(policy.delay(0, {'Retry-After': '600'}))
+
+    def test_backoff_grows_up_to_the_maximum(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+        self.assertEqual([policy.delay(attempt) for attempt in range(5)],
+                         [1, 2, 4, 5, 5])
+
+
+class RetryingClientTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cassette.jsonl')
+        self.get = request_key('GET', BASE_URL + '/document.json',
+                               params={'id': 1})
+        self.post = request_key('POST', BASE_URL + '/collection.json',
+                                data={'name': 'Winter'})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def client(self, exchanges, errors=()):
+        with open(self.path, 'w') as f:
+            for exchange in exchanges:
+                f.write(json.dumps(exchange) + '\n')
+        self.transport = FailingTransport(self.path, errors)
+        return Yumpu('token', transport=self.transport,
+                     retry=RetryPolicy(total=2, backoff_factor=0))
+
+    def test_retries_failed_gets_and_counts_them(self):
+        yumpu = self.client([
+            {'k': self.get, 's': 503, 'h': {'Retry-After': '0'},
+             'b': '{"state": "error"}'},
+            {'k': self.get, 's': 200,
+             'b': '{"state": "success", "document": [{"id": "1"}]}'},
+        ])
+        self.assertEqual(yumpu.document_get(1)['state'], 'success')
+        stats = yumpu.retry_stats
+        self.assertEqual((stats.requests, stats.attempts, stats.retries,
+                          stats.exhausted), (1, 2, 1, 0))
+
+    def test_counts_exhausted_retries(self):
+        yumpu = self.client([
+            {'k': self.get, 's': 503, 'b': '{"state": "error"}'},
+        ])
+        self.assertEqual(yumpu.document_get(1)['state'], 'error')
+        stats = yumpu.retry_stats
+        self.assertEqual((stats.attempts, stats.retries, stats.exhausted),
+                         (3, 2, 1))
+
+    def test_never_retries_failed_posts(self):
+        yumpu = self.client([
+            {'k': self.post, 's': 503, 'b': '{"state": "error"}'},
+        ])
+        self.assertEqual(yumpu.collection_post('Winter')['state'], 'error')
+        self.assertEqual(self.transport.sent, 1)
+        with self.assertRaises(requests.ReadTimeout):
+            self.client([], [requests.ReadTimeout()]).collection_post(
+                'Winter')
+        self.assertEqual(self.transport.sent, 1)
+
+    def test_retries_posts_which_could_not_connect(self):
+        yumpu = self.client([
+            {'k': self.post, 's': 200, 'b': '{"state": "success"}'},
+        ], [requests.ConnectTimeout()])
+        self.assertEqual(yumpu.collection_post('Winter')['state'], 'success')
+        self.assertEqual(self.transport.sent, 2)
+
+    def test_uploads_take_a_timeout(self):
+        upload = request_key('POST', BASE_URL + '/document/file.json')
+        yumpu = self.client([
+            {'k': upload, 's': 200, 'b': '{"state": "success"}'},
+        ])
+        yumpu.document_post_file(title='My catalogue',
+                                 filename=bytearray(b'%PDF-1.4'), timeout=600)
+        self.assertEqual(self.transport.timeouts, [600])
+
+
+if __name__ == '__main__':
+    unittest.main()
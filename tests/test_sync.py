@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'benchmarks'))
+
+from fake_server import FakeYumpu, start  # noqa: E402
+from yumpu_sdk.api import Yumpu  # noqa: E402
+from yumpu_sdk.sync import JSONStore, Mirror  # noqa: E402
+
+
+class Interrupted(Exception):
+    pass
+
+
+class MirrorTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = FakeYumpu(250, hotspots=2, collections=0)
+        cls.server = start(cls.api)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.yumpu = Yumpu('token', base_url=self.server.url)
+
+    def tearDown(self):
+        self.yumpu.close()
+        shutil.rmtree(self.directory)
+
+    def test_incremental_sync_stops_at_the_first_unchanged_page(self):
+        mirror = Mirror(self.yumpu, JSONStore(self.directory))
+        counts = mirror.sync_documents()
+        self.assertEqual((counts['new'], counts['pages']), (250, 3))
+        self.assertFalse(os.path.exists(mirror.store.journal))
+        counts = Mirror(self.yumpu, JSONStore(self.directory)).sync_documents()
+        self.assertEqual((counts['new'], counts['updated'], counts['pages']),
+                         (0, 0, 1))
+
+    def test_interrupted_full_scan_resumes_from_its_checkpoint(self):
+        calls = []
+        documents_get = self.yumpu.documents_get
+
+        def failing_documents_get(offset, *args):
+            calls.append(offset)
+            if len(calls) == 3:
+                raise Interrupted()
+            return documents_get(offset, *args)
+        self.yumpu.documents_get = failing_documents_get
+        mirror = Mirror(self.yumpu, JSONStore(self.directory))
+        with self.assertRaises(Interrupted):
+            mirror.sync_documents(full=True)
+        self.assertFalse(os.path.exists(os.path.join(self.directory,
+                                                     'documents.json')))
+
+        store = JSONStore(self.directory)
+        self.assertEqual(len(store.documents), 200)
+        self.assertEqual(len(store.scanned), 200)
+        self.assertEqual(store.state['documents']['scan']['offset'], 200)
+        counts = Mirror(self.yumpu, store).sync_documents(full=True)
+        self.assertEqual(calls, [0, 100, 200, 200])
+        self.assertEqual((counts['new'], counts['deleted']), (50, 0))
+        self.assertEqual(len(JSONStore(self.directory).documents), 250)
+        self.assertEqual(store.scanned, {})
+
+    def test_failed_hotspots_are_fetched_again(self):
+        iter_hotspots = self.yumpu.iter_hotspots
+        broken = set([self.api.documents[0]['id']])
+
+        def failing_iter_hotspots(id, *args, **kwargs):
+            if id in broken:
+                raise Interrupted()
+            return iter_hotspots(id, *args, **kwargs)
+        self.yumpu.iter_hotspots = failing_iter_hotspots
+        mirror = Mirror(self.yumpu, JSONStore(self.directory), hotspots=True)
+        counts = mirror.sync_documents()
+        self.assertEqual(counts['errors'], 1)
+        self.assertEqual(len(mirror.store.hotspots), 249)
+
+        broken.clear()
+        mirror = Mirror(self.yumpu, JSONStore(self.directory), hotspots=True)
+        counts = mirror.sync_documents()
+        self.assertEqual((counts['errors'], counts['pages']), (0, 1))
+        self.assertEqual(len(mirror.store.hotspots), 250)
+        self.assertEqual(mirror.store.state['documents']['hotspots_failed'],
+                         [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from yumpu_sdk.api import Yumpu
+from yumpu_sdk.exceptions import CassetteError
+from yumpu_sdk.retry import RetryPolicy
+from yumpu_sdk.transport import ReplayTransport, request_key
+
+
+class ReplayTransportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cassette.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_cassette(self, exchanges):
+        with open(self.path, 'w') as f:
+            for exchange in exchanges:
+                f.write(json.dumps(exchange) + '\n')
+
+    def client(self):
+        return Yumpu('token', transport=ReplayTransport(self.path),
+                     retry=RetryPolicy(backoff_factor=0))
+
+    def test_replays_a_retried_exchange(self):
+        key = request_key('GET', 'http://api.yumpu.com/2.0/document.json',
+                          params={'id': 1})
+        self.write_cassette([
+            {'k': key, 's': 503, 'h': {'Retry-After': '0'},
+             'b': '{"state": "error"}', 't': 0.01},
+            {'k': key, 's': 200, 'h': {},
+             'b': '{"state": "success", "document": [{"id": "1"}]}',
+             't': 0.01},
+        ])
+        events = []
+        with self.client() as yumpu:
+            yumpu.hooks.after_response.append(events.append)
+            response = yumpu.document_get(1)
+        self.assertEqual(response['document'][0]['id'], '1')
+        self.assertEqual(events[0].status, 200)
+        self.assertEqual(events[0].attempts, 2)
+
+    def test_missing_exchange_finishes_the_event(self):
+        self.write_cassette([])
+        events = []
+        with self.client() as yumpu:
+            yumpu.hooks.after_response.append(events.append)
+            with self.assertRaises(CassetteError):
+                yumpu.document_get(1)
+        self.assertEqual(len(events), 1)
+        self.assertIsInstance(events[0].error, CassetteError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,574 @@
+# -*- coding: utf-8 -*-
+"""
+An asyncio flavour of the Yumpu client.
+
+It needs python 3 and the aiohttp package::
+
+    pip install yumpu-sdk[async]
+"""
+import asyncio
+import copy
+import heapq
+from urllib.parse import urlencode
+
+import aiohttp
+
+from .api import (BASE_URL, DEFAULT_TIMEOUT, REFERENCE_TTL, SEARCH_URL,
+                  Yumpu)
+from .batch import DEFAULT_CONCURRENCY, BatchResult, check_response
+from .cache import ReferenceCache, ResponseCache
+from .diff import DOCUMENT_PUT_FIELDS, USER_PUT_FIELDS, changes, current_record
+from .exceptions import YumpuError
+from .hooks import Hooks
+from .jsonlib import get_decoder
+from .models import wrap
+from .multipart import MultipartEncoder
+from .pagination import MAX_LIMIT, is_last_page, page_records
+from .retry import RetryPolicy, RetryStats
+from .waiter import ConversionWaiter
+
+
+# Older aiohttp versions only raise the ServerTimeoutError it derives from.
+CONNECT_TIMEOUT = getattr(aiohttp, 'ConnectionTimeoutError', ())
+
+
+def _form_value(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value)
+
+
+def _clean(params):
+    """
+    aiohttp refuses None values, while requests just skips them. Do the
+    same thing as requests, so every endpoint method can be reused as is.
+    """
+    return dict(
+        (key, _form_value(value)) for key, value in params.items()
+        if value is not None
+    )
+
+
+def _request_size(data, upload):
+    """
+    About the size of the body sent for the form fields or the upload.
+    """
+    if upload is not None:
+        return upload.length or 0
+    return len(urlencode(data)) if data else 0
+
+
+async def _stream(upload):
+    """
+    The chunks of a multipart body, as an aiohttp payload. The file is read
+    in the default executor, so a slow disk doesn't block the other
+    requests of the loop, and the progress is reported from the loop.
+    """
+    loop = asyncio.get_event_loop()
+    while True:
+        chunk = await loop.run_in_executor(None, upload.read_bytes,
+                                           upload.chunk_size)
+        if not chunk:
+            return
+        upload.report()
+        yield chunk
+
+
+async def aiter_pages(fetch, key, offset=0, limit=MAX_LIMIT, prefetch=False):
+    """
+    The asyncio version of :func:`yumpu_sdk.pagination.iter_pages`, where
+    ``fetch`` is a coroutine function.
+    """
+    limit = min(limit, MAX_LIMIT)
+    pending = asyncio.ensure_future(fetch(offset, limit))
+    try:
+        while pending is not None:
+            response = await pending
+            records = page_records(response, key)
+            pending = None
+            if not is_last_page(response, records, offset, limit):
+                offset += len(records)
+                pending = fetch(offset, limit)
+                if prefetch:
+                    pending = asyncio.ensure_future(pending)
+            for record in records:
+                yield record
+    finally:
+        if pending is not None:
+            if asyncio.isfuture(pending):
+                pending.cancel()
+            else:
+                pending.close()
+
+
+async def arun_many(func, ids, concurrency=DEFAULT_CONCURRENCY):
+    """
+    The asyncio version of :func:`yumpu_sdk.batch.run_many`, where ``func``
+    is a coroutine function.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(id):
+        async with semaphore:
+            try:
+                return BatchResult(id, check_response(await func(id)))
+            except Exception as e:
+                return BatchResult(id, error=e)
+
+    return list(await asyncio.gather(*[run_one(id) for id in ids]))
+
+
+class AsyncConversionWaiter(ConversionWaiter):
+    """
+    The asyncio version of :class:`yumpu_sdk.waiter.ConversionWaiter`,
+    polling with an :class:`AsyncYumpu` client.
+    """
+
+    async def wait(self, progress_ids, timeout=None, first_poll=None):
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        deadline = None if timeout is None else started + timeout
+        if first_poll is None:
+            first_poll = self.min_interval
+        queue = [(started + first_poll, id) for id in set(progress_ids)]
+        heapq.heapify(queue)
+        while queue:
+            wake = queue[0][0]
+            if deadline is not None and wake > deadline:
+                return
+            now = loop.time()
+            if wake > now:
+                await asyncio.sleep(wake - now)
+                now = loop.time()
+            due = []
+            while queue and queue[0][0] <= now:
+                due.append(heapq.heappop(queue)[1])
+            self.requests += len(due)
+            results = await arun_many(self.yumpu.progess_get, due,
+                                      self.concurrency)
+            now = loop.time()
+            for result in results:
+                if result.ok and self.is_finished(result.response):
+                    yield result.id, result.response
+                elif isinstance(result.error, YumpuError):
+                    yield result.id, result.error.response
+                else:
+                    next_poll = now + self.interval(now - started)
+                    heapq.heappush(queue, (next_poll, result.id))
+
+
+class AsyncYumpu(Yumpu):
+    """
+    The same API as :class:`yumpu_sdk.api.Yumpu`, but every endpoint method
+    returns an awaitable. All the requests of one client share a single
+    aiohttp connection pool, so you can keep hundreds of requests in flight
+    on one event loop.
+
+    >>> import asyncio
+    >>> from yumpu_sdk.aio import AsyncYumpu
+    >>> async def main():
+    ...     async with AsyncYumpu('YOUR_TOKEN_HERE') as yumpu:
+    ...         return await asyncio.gather(
+    ...             yumpu.document_get(53312964),
+    ...             yumpu.collections_get(),
+    ...         )
+    >>> asyncio.run(main())
+    """
+
+    def __init__(self, token, pool_size=100, pool_maxsize=0,
+                 keep_alive=True, keepalive_timeout=15, rate_limiter=None,
+                 timeout=DEFAULT_TIMEOUT, retry=None,
+                 reference_ttl=REFERENCE_TTL, reference_cache_dir=None,
+                 response_cache=None, search_cache=None, models=False,
+                 json_decoder=None, base_url=BASE_URL, search_url=SEARCH_URL):
+        """
+        :param str token: the token for working with API
+        :param int pool_size: the maximum number of simultaneous connections (0 for unlimited)
+        :param int pool_maxsize: the maximum number of simultaneous connections to one host (0 for unlimited)
+        :param bool keep_alive: keep connections open between requests
+        :param float keepalive_timeout: how many seconds an idle connection is kept open
+        :param rate_limiter: a :class:`yumpu_sdk.ratelimit.RateLimiter` pacing the requests without blocking the event loop
+        :param float timeout: the default timeout of requests in seconds (None to wait forever)
+        :param retry: a :class:`yumpu_sdk.retry.RetryPolicy`; by default the idempotent requests are retried 3 times
+        :param float reference_ttl: how many seconds the categories, languages and countries are cached (0 disables the cache)
+        :param str reference_cache_dir: a directory where to cache them on disk too, shared between processes
+        :param response_cache: a :class:`yumpu_sdk.cache.ResponseCache` for the responses of document_get, collection_get and section_get (disabled by default)
+        :param search_cache: a :class:`yumpu_sdk.cache.SearchCache` for the responses of search (disabled by default)
+        :param bool models: return the records of the responses as :mod:`yumpu_sdk.models` objects instead of dicts
+        :param json_decoder: the JSON decoder of the responses: orjson, ujson, json or a function decoding bytes; the fastest one installed by default
+        :param str base_url: the url of Yumpu API, to use a proxy or a test server
+        :param str search_url: the url of the search API of Yumpu
+        """
+        self.token = token
+        self.headers = {'X-ACCESS-TOKEN': self.token}
+        self.pool_size = pool_size
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.keepalive_timeout = keepalive_timeout
+        self.session = None
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.retry_stats = RetryStats()
+        self.reference_cache = None
+        if reference_ttl:
+            self.reference_cache = ReferenceCache(reference_ttl,
+                                                  reference_cache_dir)
+        self.response_cache = response_cache
+        self.search_cache = search_cache
+        self.searches = {}
+        self.models = models
+        if json_decoder is None or isinstance(json_decoder, str):
+            json_decoder = get_decoder(json_decoder)
+        self.json_decoder = json_decoder
+        self.hooks = Hooks()
+        self.base_url = base_url
+        self.search_url = search_url
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __enter__(self):
+        raise TypeError('Use "async with" with AsyncYumpu')
+
+    def get_session(self):
+        """
+        Return the shared aiohttp session, creating it on first use, so it
+        is bound to the running event loop.
+        """
+        if self.session is None or self.session.closed:
+            if self.keep_alive:
+                connector = aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    limit_per_host=self.pool_maxsize,
+                    keepalive_timeout=self.keepalive_timeout
+                )
+            else:
+                connector = aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    limit_per_host=self.pool_maxsize,
+                    force_close=True
+                )
+            self.session = aiohttp.ClientSession(
+                connector=connector, headers=self.headers
+            )
+        return self.session
+
+    async def close(self):
+        """
+        Close all the pooled connections of this client.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def pace(self, method, url):
+        """
+        Wait until the rate limiter lets the request go, without blocking
+        the event loop.
+        """
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(method, url)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def do_request(self, method, url, timeout=None, params=None,
+                         data=None, files=None, headers=None, raw=False,
+                         callback=None):
+        """
+        Send a request through the shared connection pool, retrying it
+        according to the retry policy of the client.
+
+        :param str method: the HTTP verb (GET, POST, PUT or DELETE)
+        :param str url: the absolute url for sending request
+        :param float timeout: the timeout in seconds, the default timeout of the client if not given
+        :param dict params: the query string params
+        :param dict data: the form fields
+        :param dict files: the files to send, as a dict of field name and a path, bytes or a file object
+        :param dict headers: headers to send in addition to the headers of the client
+        :param bool raw: return a ``(status, headers, result)`` tuple instead of the result only
+        :param callback: called as ``callback(bytes_sent, total_bytes)`` while the files are uploaded
+        :returns: the result of request
+        :rtype: json
+        """
+        changes = data
+        if timeout is None:
+            timeout = self.timeout
+        if params is not None:
+            params = _clean(params)
+        if data is not None:
+            data = _clean(data)
+        # Like requests, the timeout limits connecting and every read, not
+        # the whole request, so big uploads aren't cut short.
+        client_timeout = aiohttp.ClientTimeout(sock_connect=timeout,
+                                               sock_read=timeout)
+        upload = None
+        if files:
+            # The same encoder as the sync client: the files are streamed
+            # from the disk, with a Content-Length, and report progress.
+            upload = MultipartEncoder(data, files, callback=callback)
+            headers = dict(headers or {})
+            headers['Content-Type'] = upload.content_type
+            if upload.length is not None:
+                headers['Content-Length'] = str(upload.length)
+        event = self.hooks.start(method, url)
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        sleep_time = 0.0
+        attempt = 0
+        try:
+            while True:
+                await self.pace(method, url)
+                body = data
+                if upload is not None:
+                    if attempt:
+                        upload.seek(0)
+                    body = _stream(upload)
+                try:
+                    async with self.get_session().request(
+                            method, url, params=params, data=body,
+                            headers=headers, timeout=client_timeout) as r:
+                        failed = self.retry.is_retryable_status(r.status)
+                        delay = None
+                        if failed and self.retry.can_retry(method, attempt):
+                            delay = self.retry.delay(attempt, r.headers)
+                        if delay is None:
+                            self.retry_stats.record(attempt + 1, sleep_time,
+                                                    loop.time() - started,
+                                                    failed and attempt > 0)
+                            if self.response_cache is not None and \
+                                    method != 'GET':
+                                self.response_cache.invalidate_for(
+                                    method, url, changes)
+                            result = body = None
+                            if r.status != 304:
+                                body = await r.read()
+                                if body.strip():
+                                    result = self.json_decoder(body)
+                                if self.models:
+                                    search = url.startswith(self.search_url)
+                                    result = wrap(result, search=search)
+                            if event is not None:
+                                self.hooks.finish(event, r.status, body,
+                                                  _request_size(data, upload),
+                                                  attempt + 1)
+                            if raw:
+                                return r.status, r.headers, result
+                            return result
+                except (aiohttp.ClientConnectionError,
+                        asyncio.TimeoutError) as e:
+                    # The same rule as the sync client: only a connect
+                    # timeout proves the request was never received.
+                    never_sent = isinstance(e, CONNECT_TIMEOUT)
+                    delay = None
+                    if self.retry.can_retry(method, attempt, never_sent):
+                        delay = self.retry.delay(attempt)
+                    if delay is None:
+                        self.retry_stats.record(attempt + 1, sleep_time,
+                                                loop.time() - started, True)
+                        raise
+                await asyncio.sleep(delay)
+                sleep_time += delay
+                attempt += 1
+        except BaseException as e:
+            # Whatever failed, a hook, a cancellation or the decoding of
+            # the body, the event is finished, so no span is left open.
+            self.hooks.finish(event, attempts=attempt + 1, error=e)
+            raise
+        finally:
+            if upload is not None:
+                upload.close()
+
+    def do_get(self, entry_point, params={}, uri=None, timeout=None):
+        url = "%s%s" % (uri or self.base_url, entry_point)
+        return self.do_request('GET', url, timeout, params=params)
+
+    async def do_post(self, entry_point, params={}, filename=None,
+                      uri=None, timeout=None, progress_callback=None,
+                      upload_stats=None):
+        url = "%s%s" % (uri or self.base_url, entry_point)
+        if filename is None:
+            return await self.do_request('POST', url, timeout, data=params)
+        callbacks = [c for c in (progress_callback, upload_stats)
+                     if c is not None]
+
+        def callback(bytes_sent, total_bytes):
+            for c in callbacks:
+                c(bytes_sent, total_bytes)
+        result = await self.do_request(
+            'POST', url, timeout, data=params, files={'file': filename},
+            callback=callback if callbacks else None)
+        if upload_stats is not None:
+            upload_stats.response_received()
+        return result
+
+    def do_delete(self, entry_point, id, uri=None, timeout=None):
+        url = "%s%s" % (uri or self.base_url, entry_point)
+        return self.do_request('DELETE', url, timeout, data={'id': id})
+
+    def do_put(self, entry_point, params={}, uri=None, timeout=None):
+        url = "%s%s" % (uri or self.base_url, entry_point)
+        return self.do_request('PUT', url, timeout, data=params)
+
+    async def cached_get(self, entry_point, params={}):
+        cache = self.response_cache
+        if cache is None:
+            return await self.do_get(entry_point, params)
+        key = ResponseCache.key(entry_point, params)
+        cached = cache.lookup(key)
+        headers = {}
+        if cached is not None:
+            response, fresh, validators = cached
+            if fresh:
+                return response
+            if 'etag' in validators:
+                headers['If-None-Match'] = validators['etag']
+            if 'last_modified' in validators:
+                headers['If-Modified-Since'] = validators['last_modified']
+        url = "%s%s" % (self.base_url, entry_point)
+        status, response_headers, response = await self.do_request(
+            'GET', url, params=params, headers=headers, raw=True)
+        if status == 304 and cached is not None:
+            cache.renew(key)
+            return cached[0]
+        if isinstance(response, dict) and response.get('state') == 'success':
+            validators = {}
+            if response_headers.get('ETag'):
+                validators['etag'] = response_headers['ETag']
+            if response_headers.get('Last-Modified'):
+                validators['last_modified'] = response_headers['Last-Modified']
+            cache.store(key, response, validators)
+        return response
+
+    async def reference_get(self, entry_point):
+        if self.reference_cache is None:
+            return await self.do_get(entry_point)
+        response = self.reference_cache.get(entry_point)
+        if response is None:
+            response = await self.do_get(entry_point)
+            if response.get('state') == 'success':
+                self.reference_cache.set(entry_point, response)
+        return response
+
+    async def search_get(self, entry_point, params):
+        cache = self.search_cache
+        if cache is None:
+            return await self.do_get(entry_point, params, self.search_url)
+        key = cache.key(params)
+        response = cache.get(key)
+        if response is not None:
+            cache.hits += 1
+            return response
+        # The identical searches running at the same time wait for the
+        # first one, like SearchCache.fetch does for threads.
+        pending = self.searches.get(key)
+        if pending is not None:
+            cache.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(pending))
+        cache.misses += 1
+        pending = self.searches[key] = asyncio.ensure_future(
+            self.do_get(entry_point, params, self.search_url))
+        try:
+            response = await asyncio.shield(pending)
+        finally:
+            if pending.done():
+                del self.searches[key]
+            else:
+                pending.add_done_callback(
+                    lambda _: self.searches.pop(key, None))
+        if isinstance(response, dict) and response.get('state') == 'success':
+            cache.set(key, response)
+        return copy.deepcopy(response)
+
+    def iter_documents(self, sort='desc', return_fields=[], offset=0,
+                       page_size=MAX_LIMIT, prefetch=False):
+        def fetch(offset, limit):
+            return self.documents_get(offset, limit, sort, return_fields)
+        return aiter_pages(fetch, 'documents', offset, page_size, prefetch)
+
+    def iter_hotspots(self, document_id, page=None, sort='page_asc',
+                      return_fields=[], offset=0, page_size=MAX_LIMIT,
+                      prefetch=False):
+        def fetch(offset, limit):
+            return self.document_hotspots_get(document_id, page, offset, limit,
+                                              sort, return_fields)
+        return aiter_pages(fetch, 'hotspots', offset, page_size, prefetch)
+
+    def iter_collections(self, return_fields=[], offset=0,
+                         page_size=MAX_LIMIT, prefetch=False):
+        def fetch(offset, limit):
+            return self.collections_get(offset, limit, return_fields)
+        return aiter_pages(fetch, 'collections', offset, page_size, prefetch)
+
+    def iter_search(self, q, in_=['author', 'title', 'description', 'tags'],
+                    op='or',
+                    return_fields=[
+                        'id', 'url', 'short_url', 'image_small',
+                        'image_medium', 'image_big', 'language', 'title',
+                        'description', 'tags', 'embed_code'
+                    ],
+                    sort=None, offset=0, page_size=MAX_LIMIT, prefetch=False,
+                    **filters):
+        def fetch(offset, limit):
+            return self.search(q, in_, op, offset, limit, return_fields, sort,
+                               **filters)
+        return aiter_pages(fetch, 'documents', offset, page_size, prefetch)
+
+    def document_get_many(self, ids, return_fields=[],
+                          concurrency=DEFAULT_CONCURRENCY):
+        return arun_many(lambda id: self.document_get(id, return_fields),
+                         ids, concurrency)
+
+    def hotspot_get_many(self, ids,
+                         return_fields=[
+                             'id', 'document_id', 'page', 'type',
+                             'settings', 'create_date', 'update_date'
+                         ],
+                         concurrency=DEFAULT_CONCURRENCY):
+        return arun_many(
+            lambda id: self.document_hotspot_get(id, return_fields),
+            ids, concurrency
+        )
+
+    def collection_get_many(self, ids, return_fields=[],
+                            concurrency=DEFAULT_CONCURRENCY):
+        return arun_many(lambda id: self.collection_get(id, return_fields),
+                         ids, concurrency)
+
+    def section_get_many(self, ids, return_fields=[],
+                         concurrency=DEFAULT_CONCURRENCY):
+        return arun_many(lambda id: self.section_get(id, return_fields),
+                         ids, concurrency)
+
+    def wait_for_documents(self, progress_ids, timeout=None, min_interval=2.0,
+                           max_interval=60.0, concurrency=DEFAULT_CONCURRENCY):
+        """
+        The same as :meth:`yumpu_sdk.api.Yumpu.wait_for_documents`, but
+        returning an asynchronous generator::
+
+            async for progress_id, response in yumpu.wait_for_documents(ids):
+                print(progress_id, response['document'])
+        """
+        waiter = AsyncConversionWaiter(self, min_interval, max_interval,
+                                       concurrency=concurrency)
+        return waiter.wait(progress_ids, timeout)
+
+    async def document_put_changes(self, id, document=None, **kwargs):
+        if document is None:
+            document = current_record(await self.document_get(id),
+                                      'document')
+        changed = changes(document, kwargs, DOCUMENT_PUT_FIELDS)
+        if not changed:
+            return None
+        return await self.document_put(id=id, **changed)
+
+    async def user_put_changes(self, user=None, **kwargs):
+        if user is None:
+            user = current_record(await self.user_get(), 'user')
+        changed = changes(user, kwargs, USER_PUT_FIELDS)
+        if not changed:
+            return None
+        return await self.user_put(**changed)
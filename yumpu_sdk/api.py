@@ -1,9 +1,38 @@
 # -*- coding: utf-8 -*-
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from .batch import DEFAULT_CONCURRENCY, run_many
+from .cache import ReferenceCache, ResponseCache
+from .diff import DOCUMENT_PUT_FIELDS, USER_PUT_FIELDS, changes, current_record
+from .hooks import Hooks, body_size
+from .jsonlib import get_decoder
+from .models import wrap
+from .multipart import MultipartEncoder
+from .pagination import MAX_LIMIT, iter_pages
+from .retry import RetryPolicy, RetryStats
+from .transport import RequestsTransport
+from .waiter import ConversionWaiter
 
 
 BASE_URL = 'http://api.yumpu.com/2.0'
 SEARCH_URL = 'http://search.yumpu.com/2.0'
+DEFAULT_TIMEOUT = 60
+REFERENCE_TTL = 24 * 60 * 60
+
+
+def rewind(kwargs):
+    """
+    Put the files of a request back to their beginning, so the request can
+    be sent again.
+    """
+    bodies = list((kwargs.get('files') or {}).values())
+    bodies.append(kwargs.get('data'))
+    for body in bodies:
+        if hasattr(body, 'seek'):
+            body.seek(0)
 
 
 class Yumpu():
@@ -18,11 +47,38 @@ class Yumpu():
     important of them is that you can upload only one PDF every 15 minutes.
     """
 
-    def __init__(self, token):
+    def __init__(self, token, pool_connections=10, pool_maxsize=10,
+                 pool_block=False, keep_alive=True, rate_limiter=None,
+                 timeout=DEFAULT_TIMEOUT, retry=None,
+                 reference_ttl=REFERENCE_TTL, reference_cache_dir=None,
+                 response_cache=None, search_cache=None, models=False,
+                 json_decoder=None, base_url=BASE_URL, search_url=SEARCH_URL,
+                 transport=None):
         """
         For begin working with Yumpu you need to specify your token.
 
+        Every instance owns a pooled HTTP session, so the TCP and TLS
+        connections are reused between requests. Close it with
+        :meth:`close` when you don't need it anymore, or use the client as
+        a context manager.
+
         :params str token: the token for working with API. You can obtain it on https://www.yumpu.com/en/account/profile/api
+        :param int pool_connections: the number of hosts to keep connection pools for
+        :param int pool_maxsize: the maximum number of connections kept open per host
+        :param bool pool_block: wait for a free connection when the pool is exhausted instead of opening a new one
+        :param bool keep_alive: keep connections open between requests
+        :param rate_limiter: a :class:`yumpu_sdk.ratelimit.RateLimiter` (or any object with a ``reserve(method, url)`` method returning the seconds to wait) pacing the requests
+        :param float timeout: the default timeout of requests in seconds (None to wait forever)
+        :param retry: a :class:`yumpu_sdk.retry.RetryPolicy`; by default the idempotent requests are retried 3 times
+        :param float reference_ttl: how many seconds the categories, languages and countries are cached (0 disables the cache)
+        :param str reference_cache_dir: a directory where to cache them on disk too, shared between processes
+        :param response_cache: a :class:`yumpu_sdk.cache.ResponseCache` for the responses of document_get, collection_get and section_get (disabled by default)
+        :param search_cache: a :class:`yumpu_sdk.cache.SearchCache` for the responses of search (disabled by default)
+        :param bool models: return the records of the responses as :mod:`yumpu_sdk.models` objects instead of dicts
+        :param json_decoder: the JSON decoder of the responses: orjson, ujson, json or a function decoding bytes; the fastest one installed by default
+        :param str base_url: the url of Yumpu API, to use a proxy or a test server
+        :param str search_url: the url of the search API of Yumpu
+        :param transport: what sends the requests: a :class:`yumpu_sdk.transport.RecordingTransport` or :class:`yumpu_sdk.transport.ReplayTransport` to record or replay them, a :class:`yumpu_sdk.transport.RequestsTransport` by default
 
         :Example:
 
@@ -30,11 +86,169 @@ class Yumpu():
 
 
             yumpu = Yumpu('YOUR_TOKEN_HERE')
+
+            with Yumpu('YOUR_TOKEN_HERE', pool_maxsize=20) as yumpu:
+                yumpu.documents_get()
         """
         self.token = token
         self.headers = {'X-ACCESS-TOKEN': self.token}
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+        self.session = requests.Session()
+        self.pool_maxsize = pool_maxsize
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.retry_stats = RetryStats()
+        self.reference_cache = None
+        if reference_ttl:
+            self.reference_cache = ReferenceCache(reference_ttl,
+                                                  reference_cache_dir)
+        self.response_cache = response_cache
+        self.search_cache = search_cache
+        self.models = models
+        if json_decoder is None or isinstance(json_decoder, str):
+            json_decoder = get_decoder(json_decoder)
+        self.json_decoder = json_decoder
+        self.hooks = Hooks()
+        self.base_url = base_url
+        self.search_url = search_url
+        self.transport = transport or RequestsTransport()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Close all the pooled connections of this client, and the cassette
+        of its transport if it has one.
+        """
+        self.session.close()
+        if hasattr(self.transport, 'close'):
+            self.transport.close()
+
+    def batch_concurrency(self, concurrency):
+        """
+        The number of threads of a batch: at most ``pool_maxsize``, as the
+        connections opened beyond it are thrown away after every request.
+        """
+        return max(1, min(concurrency, self.pool_maxsize))
+
+    def pace(self, method, url):
+        """
+        Wait until the rate limiter lets the request go.
+        """
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(method, url)
+            if delay > 0:
+                time.sleep(delay)
+
+    def send_request(self, method, url, timeout=None, headers=None,
+                     **kwargs):
+        """
+        Send a request through the transport of this client, retrying
+        it according to the retry policy of the client.
+
+        :param str method: the HTTP verb (GET, POST, PUT or DELETE)
+        :param str url: the absolute url for sending request
+        :param float timeout: the timeout in seconds, the default timeout of the client if not given
+        :param dict headers: headers to send in addition to the headers of the client
+        :returns: the response
+        :rtype: requests.Response
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if headers:
+            headers = dict(self.headers, **headers)
+        else:
+            headers = self.headers
+        event = self.hooks.start(method, url)
+        started = time.time()
+        sleep_time = 0.0
+        attempt = 0
+        try:
+            while True:
+                self.pace(method, url)
+                try:
+                    r = self.transport.send(self.session, method, url,
+                                            headers=headers, timeout=timeout,
+                                            **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    never_sent = isinstance(
+                        e, requests.exceptions.ConnectTimeout)
+                    delay = None
+                    if self.retry.can_retry(method, attempt, never_sent):
+                        delay = self.retry.delay(attempt)
+                    if delay is None:
+                        self.retry_stats.record(attempt + 1, sleep_time,
+                                                time.time() - started, True)
+                        raise
+                else:
+                    delay = None
+                    failed = self.retry.is_retryable_status(r.status_code)
+                    if failed and self.retry.can_retry(method, attempt):
+                        delay = self.retry.delay(attempt, r.headers)
+                    if delay is None:
+                        self.retry_stats.record(attempt + 1, sleep_time,
+                                                time.time() - started,
+                                                failed and attempt > 0)
+                        if self.response_cache is not None and method != 'GET':
+                            self.response_cache.invalidate_for(
+                                method, url, kwargs.get('data'))
+                        if event is not None:
+                            self.hooks.finish(event, r.status_code, r.content,
+                                              body_size(r.request.body),
+                                              attempt + 1)
+                        return r
+                    r.close()
+                time.sleep(delay)
+                sleep_time += delay
+                attempt += 1
+                rewind(kwargs)
+        except BaseException as e:
+            # Whatever failed, a transport, a hook or a cassette, the event
+            # is finished, so no span is left open.
+            self.hooks.finish(event, attempts=attempt + 1, error=e)
+            raise
+
+    def do_request(self, method, url, timeout=None, headers=None, **kwargs):
+        """
+        Send a request and decode its result. All the other ``do_*``
+        methods end up here.
+
+        :param str method: the HTTP verb (GET, POST, PUT or DELETE)
+        :param str url: the absolute url for sending request
+        :param float timeout: the timeout in seconds, the default timeout of the client if not given
+        :param dict headers: headers to send in addition to the headers of the client
+        :returns: the result of request
+        :rtype: json
+        """
+        r = self.send_request(method, url, timeout, headers, **kwargs)
+        return self.decode(r)
 
-    def do_get(self, entry_point, params={}, uri=BASE_URL):
+    def decode(self, r):
+        """
+        Decode the JSON body of a response.
+
+        :param requests.Response r: the response
+        :rtype: json
+        """
+        response = self.json_decoder(r.content)
+        if self.models:
+            response = wrap(response, search=r.url.startswith(self.search_url))
+        return response
+
+    def do_get(self, entry_point, params={}, uri=None, timeout=None):
         """
         This function is for getting information from API. It's a general
         function and you can use it for make strange things like send very
@@ -43,14 +257,15 @@ class Yumpu():
 
         :param str entry_point: relative url for sending request
         :param dict params: a dict with GET params to send
+        :param float timeout: the timeout in seconds, the default timeout of the client if not given
         :returns: the result of request
         :rtype: json
         """
-        url = "%s%s" % (uri, entry_point)
-        r = requests.get(url, headers=self.headers, params=params)
-        return r.json()
+        url = "%s%s" % (uri or self.base_url, entry_point)
+        return self.do_request('GET', url, timeout, params=params)
 
-    def do_post(self, entry_point, params={}, filename=None, uri=BASE_URL):
+    def do_post(self, entry_point, params={}, filename=None, uri=None,
+                timeout=None, progress_callback=None, upload_stats=None):
         """
         This is a general function for post something to Yumpu API.
         It's a very general function, and is better to use somthing more
@@ -58,44 +273,110 @@ class Yumpu():
 
         :param str entry_point: the URL where we will send the datas
         :param dict params: a dict of fields and values for sending
-        :param str filename: an absolute path to file for sending
+        :param filename: the file for sending: an absolute path, the content as bytes or a file object. It's streamed from the disk, not loaded in memory.
+        :param float timeout: the timeout in seconds, the default timeout of the client if not given
+        :param progress_callback: called as ``progress_callback(bytes_sent, total_bytes)`` while the file is uploaded
+        :param upload_stats: a :class:`yumpu_sdk.multipart.UploadStats` filled with the statistics of the upload
         :returns: a response with detailed data of resulted action
         :rtype: json
         """
-        url = "%s%s" % (uri, entry_point)
-        files = None
-        if filename:
-            files = {'file': open(filename, 'rb')}
-        r = requests.post(url, headers=self.headers, data=params, files=files)
-        return r.json()
-
-    def do_delete(self, entry_point, id, uri=BASE_URL):
+        url = "%s%s" % (uri or self.base_url, entry_point)
+        if filename is None:
+            return self.do_request('POST', url, timeout, data=params)
+        callbacks = [c for c in (progress_callback, upload_stats)
+                     if c is not None]
+
+        def callback(bytes_sent, total_bytes):
+            for c in callbacks:
+                c(bytes_sent, total_bytes)
+        with MultipartEncoder(params, {'file': filename},
+                              callback=callback if callbacks else None) \
+                as encoder:
+            headers = {'Content-Type': encoder.content_type}
+            r = self.send_request('POST', url, timeout, headers,
+                                  data=encoder.body)
+        if upload_stats is not None:
+            upload_stats.response_received()
+        return self.decode(r)
+
+    def do_delete(self, entry_point, id, uri=None, timeout=None):
         """
         This is a general function for deleting things on Yumpu.
 
         :param str entry_point: the relative url for send request to delete items
         :param str id: the id of deleting item
+        :param float timeout: the timeout in seconds, the default timeout of the client if not given
         :returns: the result of deleting action
         :rtype: json
         """
-        url = "%s%s" % (uri, entry_point)
+        url = "%s%s" % (uri or self.base_url, entry_point)
         params = {'id': id}
-        r = requests.delete(url, headers=self.headers, data=params)
-        return r.json()
+        return self.do_request('DELETE', url, timeout, data=params)
 
-    def do_put(self, entry_point, params={}, uri=BASE_URL):
+    def do_put(self, entry_point, params={}, uri=None, timeout=None):
         """
         This is a general function for send PUT requests to Yumpu API.
         Is used by other functions for update things on Yumpu.
 
         :param str entry_point: the relative path where to send datas
         :param dict params: the params to send
+        :param float timeout: the timeout in seconds, the default timeout of the client if not given
         :returns: the result of request
         :rtype: json
         """
-        url = "%s%s" % (uri, entry_point)
-        r = requests.put(url, headers=self.headers, data=params)
-        return r.json()
+        url = "%s%s" % (uri or self.base_url, entry_point)
+        return self.do_request('PUT', url, timeout, data=params)
+
+    def cached_get(self, entry_point, params={}):
+        """
+        The same as :meth:`do_get`, but using the response cache of the
+        client, if it has one. Expired responses are revalidated with
+        ``If-None-Match``/``If-Modified-Since`` when the server sent
+        validators for them.
+
+        :param str entry_point: relative url for sending request
+        :param dict params: a dict with GET params to send
+        :rtype: json
+        """
+        cache = self.response_cache
+        if cache is None:
+            return self.do_get(entry_point, params)
+        key = ResponseCache.key(entry_point, params)
+        cached = cache.lookup(key)
+        headers = {}
+        if cached is not None:
+            response, fresh, validators = cached
+            if fresh:
+                return response
+            if 'etag' in validators:
+                headers['If-None-Match'] = validators['etag']
+            if 'last_modified' in validators:
+                headers['If-Modified-Since'] = validators['last_modified']
+        url = "%s%s" % (self.base_url, entry_point)
+        r = self.send_request('GET', url, headers=headers, params=params)
+        if r.status_code == 304 and cached is not None:
+            cache.renew(key)
+            return cached[0]
+        response = self.decode(r)
+        if isinstance(response, dict) and response.get('state') == 'success':
+            validators = {}
+            if r.headers.get('ETag'):
+                validators['etag'] = r.headers['ETag']
+            if r.headers.get('Last-Modified'):
+                validators['last_modified'] = r.headers['Last-Modified']
+            cache.store(key, response, validators)
+        return response
+
+    def invalidate_cache(self, entry_point=None, id=None):
+        """
+        Forget responses of the response cache, for example after changing
+        things on Yumpu outside of this client.
+
+        :param str entry_point: the entry point to forget (/document.json, /collection.json or /collection/section.json), all of them if not given
+        :param str id: forget only the responses for this id
+        """
+        if self.response_cache is not None:
+            self.response_cache.invalidate(entry_point, id)
 
     def documents_get(self, offset=0, limit=10, sort='desc', return_fields=[]):
         """
@@ -159,6 +440,28 @@ class Yumpu():
             params['return_fields'] = ','.join(return_fields)
         return self.do_get(entry_point, params)
 
+    def iter_documents(self, sort='desc', return_fields=[], offset=0,
+                       page_size=MAX_LIMIT, prefetch=False):
+        """
+        Iterate over all your documents, requesting them page by page only
+        when they are needed.
+
+        :param str sort: Sort results ascending or descendening (asc or desc). Default is desc.
+        :param list return_fields: the same as for :meth:`documents_get`
+        :param int offset: Start from the document at position X. Default is 0.
+        :param int page_size: How many documents to request at once (max. 100)
+        :param bool prefetch: Request the next page while the current one is consumed
+        :returns: a generator of documents
+
+        >>> from yumpu_sdk.api import Yumpu
+        >>> yumpu = Yumpu('YOUR_TOKEN_HERE')
+        >>> for document in yumpu.iter_documents(return_fields=['id', 'url']):
+        ...     print(document['url'])
+        """
+        def fetch(offset, limit):
+            return self.documents_get(offset, limit, sort, return_fields)
+        return iter_pages(fetch, 'documents', offset, page_size, prefetch)
+
     def document_get(self, id, return_fields=[]):
         """
         Retrieve one document.
@@ -231,14 +534,38 @@ class Yumpu():
         }
         if return_fields:
             params['return_fields'] = ','.join(return_fields)
-        return self.do_get(entry_point, params)
+        return self.cached_get(entry_point, params)
+
+    def document_get_many(self, ids, return_fields=[],
+                          concurrency=DEFAULT_CONCURRENCY):
+        """
+        Retrieve many documents at once, sending several requests in
+        parallel.
+
+        :param list ids: ids of your documents
+        :param list return_fields: the same as for :meth:`document_get`
+        :param int concurrency: how many requests to send at the same time, at most the ``pool_maxsize`` of the client
+        :returns: one :class:`yumpu_sdk.batch.BatchResult` per id, in the same order as ``ids``
+        :rtype: list
 
-    def document_post_file(self, **kwargs):
+        >>> from yumpu_sdk.api import Yumpu
+        >>> yumpu = Yumpu('YOUR_TOKEN_HERE')
+        >>> for result in yumpu.document_get_many([53312964, 53486950]):
+        ...     if result.ok:
+        ...         print(result.response['document'][0]['title'])
+        ...     else:
+        ...         print(result.id, result.error)
+        """
+        return run_many(lambda id: self.document_get(id, return_fields),
+                        ids, self.batch_concurrency(concurrency))
+
+    def document_post_file(self, progress_callback=None, upload_stats=None,
+                           timeout=None, **kwargs):
         """
         Create a new document from PDF.
 
         :param str title: A title for your document. Min. length 5 characters, max. length 255 characters
-        :param str file: The full path to pdf for converting
+        :param filename: The pdf for converting: the full path to it, its content as bytes or a file object
         :param str description: A description for your document. Min. length 5 characters, max. length 2500 characters
         :param int category: 1, 2 or … (A list of valid category ids: Document categories)
         :param str language: en, de or … (A list of valid languages: Document languages)
@@ -267,13 +594,27 @@ class Yumpu():
         :param str subscriptions: One or multiple subscription ids (myid1 or myid1,myid2)
         :param str iap: Enable In-App Purchase (y or n)
         :param str itc_product_id: iTunes Product ID
+        :param progress_callback: called as ``progress_callback(bytes_sent, total_bytes)`` while the pdf is uploaded
+        :param upload_stats: a :class:`yumpu_sdk.multipart.UploadStats` filled with the statistics of the upload (throughput, time to first byte)
+        :param float timeout: the timeout in seconds of connecting and of every read, the default timeout of the client if not given
+
+        >>> from yumpu_sdk.api import Yumpu
+        >>> yumpu = Yumpu('YOUR_TOKEN_HERE')
+        >>> def progress(bytes_sent, total_bytes):
+        ...     print('%d of %d bytes sent' % (bytes_sent, total_bytes))
+        >>> yumpu.document_post_file(title='My catalogue',
+        ...                          filename='/home/user/catalogue.pdf',
+        ...                          progress_callback=progress)
         """
         entry_point = '/document/file.json'
-        filename = kwargs.get('filename', None)
-        kwargs.pop('filename')
-        return self.do_post(entry_point, kwargs, filename)
+        filename = kwargs.pop('filename', None)
+        if filename is None:
+            filename = kwargs.pop('file', None)
+        return self.do_post(entry_point, kwargs, filename, timeout=timeout,
+                            progress_callback=progress_callback,
+                            upload_stats=upload_stats)
 
-    def document_post_url(self, **kwargs):
+    def document_post_url(self, timeout=None, **kwargs):
         """
         Create a new document from PDF placed on given URL.
 
@@ -307,9 +648,10 @@ class Yumpu():
         :param str subscriptions: One or multiple subscription ids (myid1 or myid1,myid2)
         :param str iap: Enable In-App Purchase (y or n)
         :param str itc_product_id: iTunes Product ID
+        :param float timeout: the timeout in seconds, the default timeout of the client if not given
         """
         entry_point = '/document/url.json'
-        return self.do_post(entry_point, kwargs)
+        return self.do_post(entry_point, kwargs, timeout=timeout)
 
     def document_put(self, **kwargs):
         """
@@ -349,6 +691,28 @@ class Yumpu():
         entry_point = '/document.json'
         return self.do_put(entry_point, kwargs)
 
+    def document_put_changes(self, id, document=None, **kwargs):
+        """
+        The same as :meth:`document_put`, but sending only the parameters
+        differing from the current state of the document, and no request
+        at all when none does. Jobs enforcing settings on many documents
+        then only write the documents that drifted.
+
+        :param int id: The id of document to update.
+        :param dict document: the current document, for example from :meth:`iter_documents`; fetched with :meth:`document_get` (through the response cache, if the client has one) if not given
+        :returns: the result of request, or None if nothing changed
+        :rtype: json
+
+        >>> yumpu.document_put_changes(53312964, visibility='private',
+        ...                            player_branding='n')
+        """
+        if document is None:
+            document = current_record(self.document_get(id), 'document')
+        changed = changes(document, kwargs, DOCUMENT_PUT_FIELDS)
+        if not changed:
+            return None
+        return self.document_put(id=id, **changed)
+
     def document_delete(self, id):
         """
         This function will delete the document on Yumpu.
@@ -374,6 +738,30 @@ class Yumpu():
         }
         return self.do_get(entry_point, params)
 
+    def wait_for_documents(self, progress_ids, timeout=None, min_interval=2.0,
+                           max_interval=60.0, concurrency=DEFAULT_CONCURRENCY):
+        """
+        Wait for the conversion of many uploaded documents at once, polling
+        :meth:`progess_get` less and less often as the time passes.
+
+        :param list progress_ids: the progress ids returned by :meth:`document_post_file` or :meth:`document_post_url`
+        :param float timeout: how many seconds to wait at most (None to wait forever)
+        :param float min_interval: the shortest time between two polls of the same id
+        :param float max_interval: the longest time between two polls of the same id
+        :param int concurrency: how many ids to poll at the same time
+        :returns: a generator of ``(progress_id, response)``, yielded as soon as each conversion finishes. The ids not yielded didn't finish before the timeout.
+
+        >>> from yumpu_sdk.api import Yumpu
+        >>> yumpu = Yumpu('YOUR_TOKEN_HERE')
+        >>> ids = [yumpu.document_post_url(title='Catalogue %d' % i, url=url)['progress_id']
+        ...        for i, url in enumerate(urls)]
+        >>> for progress_id, response in yumpu.wait_for_documents(ids, timeout=3600):
+        ...     print(progress_id, response['document'])
+        """
+        waiter = ConversionWaiter(self, min_interval, max_interval,
+                                  concurrency=concurrency)
+        return waiter.wait(progress_ids, timeout)
+
     def document_hotspots_get(self, id, page=None, offset=0, limit=10,
                               sort='page_asc',
                               return_fields=[]):
@@ -400,6 +788,27 @@ class Yumpu():
             params['return_fields'] = ','.join(return_fields)
         return self.do_get(entry_point, params)
 
+    def iter_hotspots(self, document_id, page=None, sort='page_asc',
+                      return_fields=[], offset=0, page_size=MAX_LIMIT,
+                      prefetch=False):
+        """
+        Iterate over all the hotspots of a document, requesting them page by
+        page only when they are needed.
+
+        :param int document_id: the id of one of your documents
+        :param int page: filter the results by page number (1-X)
+        :param str sort: Sort results by create_date_desc, create_date_asc, page_desc, page_asc
+        :param list return_fields: the same as for :meth:`document_hotspots_get`
+        :param int offset: Start from the hotspot at position X
+        :param int page_size: How many hotspots to request at once (max. 100)
+        :param bool prefetch: Request the next page while the current one is consumed
+        :returns: a generator of hotspots
+        """
+        def fetch(offset, limit):
+            return self.document_hotspots_get(document_id, page, offset, limit,
+                                              sort, return_fields)
+        return iter_pages(fetch, 'hotspots', offset, page_size, prefetch)
+
     def document_hotspot_get(self, id,
                              return_fields=[
                                  'id', 'document_id', 'page', 'type',
@@ -420,9 +829,31 @@ class Yumpu():
             params['return_fields'] = ','.join(return_fields)
         return self.do_get(entry_point, params)
 
-    def __document_hotspot_post(self, document_id, page, type_, sx, sy, sw, sh,
-                                sname, stooltip, slink=None, ssource=None,
-                                ssource_id=None, ssource_url=None, sautoplay='n'):
+    def hotspot_get_many(self, ids,
+                         return_fields=[
+                             'id', 'document_id', 'page', 'type',
+                             'settings', 'create_date', 'update_date'
+                         ],
+                         concurrency=DEFAULT_CONCURRENCY):
+        """
+        Retrieve many document hotspots at once, sending several requests in
+        parallel.
+
+        :param list ids: your document hotspot ids
+        :param list return_fields: the same as for :meth:`document_hotspot_get`
+        :param int concurrency: how many requests to send at the same time, at most the ``pool_maxsize`` of the client
+        :returns: one :class:`yumpu_sdk.batch.BatchResult` per id, in the same order as ``ids``
+        :rtype: list
+        """
+        return run_many(
+            lambda id: self.document_hotspot_get(id, return_fields),
+            ids, self.batch_concurrency(concurrency)
+        )
+
+    def document_hotspot_post(self, document_id, page, type_, sx, sy, sw, sh,
+                              sname, stooltip, slink=None, ssource=None,
+                              ssource_id=None, ssource_url=None,
+                              sautoplay='n'):
         """
         Create a new document hotspot.
 
@@ -461,13 +892,18 @@ class Yumpu():
         }
         return self.do_post(entry_point, params)
 
-    def __document_hotspot_put(self, id, page, type, sx, sy, sw, sh,
-                             sname, stooltip, slink, ssource, ssource_id=None,
-                             ssource_url=None, sautoplay=None):
+    # The old private names, kept for the code calling them mangled.
+    __document_hotspot_post = document_hotspot_post
+
+    def document_hotspot_put(self, id, page, type, sx, sy, sw, sh,
+                             sname, stooltip, slink=None, ssource=None,
+                             ssource_id=None, ssource_url=None,
+                             sautoplay=None):
         """
         Update a document hotspot.
 
         :param str id: One of your document hotspot ids
+        :param str page: Page number (1-X)
         :param str type: Type can be link, video, audio or slideshow
         :param int sx: x position of the document hotspot
         :param int sy: y position of the document hotspot
@@ -485,6 +921,7 @@ class Yumpu():
         entry_point = '/document/hotspot.json'
         params = {
             'id': id,
+            'page': page,
             'type': type,
             'settings[x]': sx,
             'settings[y]': sy,
@@ -500,6 +937,8 @@ class Yumpu():
         }
         return self.do_put(entry_point, params)
 
+    __document_hotspot_put = document_hotspot_put
+
     def document_hotspot_delete(self, id):
         """
         Delete one document hotspot.
@@ -510,6 +949,31 @@ class Yumpu():
         entry_point = '/document/hotspot.json'
         return self.do_delete(entry_point, id)
 
+    def reference_get(self, entry_point):
+        """
+        Get one of the near static lists (categories, languages, countries),
+        from the reference cache when possible.
+
+        :param str entry_point: relative url of the list
+        :rtype: json
+        """
+        if self.reference_cache is None:
+            return self.do_get(entry_point)
+        response = self.reference_cache.get(entry_point)
+        if response is None:
+            response = self.do_get(entry_point)
+            if response.get('state') == 'success':
+                self.reference_cache.set(entry_point, response)
+        return response
+
+    def invalidate_reference_data(self):
+        """
+        Forget the cached categories, languages and countries, so they are
+        requested again on next use.
+        """
+        if self.reference_cache is not None:
+            self.reference_cache.invalidate()
+
     def categories_get(self):
         """
         Get the list of categories.
@@ -518,7 +982,7 @@ class Yumpu():
         :rtype: json
         """
         entry_point = '/document/categories.json'
-        return self.do_get(entry_point)
+        return self.reference_get(entry_point)
 
     def languages_get(self):
         """
@@ -631,7 +1095,7 @@ class Yumpu():
 
         """
         entry_point = '/document/languages.json'
-        return self.do_get(entry_point)
+        return self.reference_get(entry_point)
 
     def countries_get(self):
         """
@@ -641,7 +1105,7 @@ class Yumpu():
         :rtype: json
         """
         entry_point = '/document/countries.json'
-        return self.do_get(entry_point)
+        return self.reference_get(entry_point)
 
     def collections_get(self, offset=0, limit=10, return_fields=[]):
         """
@@ -660,6 +1124,22 @@ class Yumpu():
             params['return_fields'] = ','.join(return_fields)
         return self.do_get(entry_point, params)
 
+    def iter_collections(self, return_fields=[], offset=0,
+                         page_size=MAX_LIMIT, prefetch=False):
+        """
+        Iterate over all your collections, requesting them page by page only
+        when they are needed.
+
+        :param list return_fields: the same as for :meth:`collections_get`
+        :param int offset: Start from the collection at position X
+        :param int page_size: How many collections to request at once (max. 100)
+        :param bool prefetch: Request the next page while the current one is consumed
+        :returns: a generator of collections
+        """
+        def fetch(offset, limit):
+            return self.collections_get(offset, limit, return_fields)
+        return iter_pages(fetch, 'collections', offset, page_size, prefetch)
+
     def collection_get(self, id, return_fields=[]):
         """
         Retrieve one collection.
@@ -673,7 +1153,22 @@ class Yumpu():
         }
         if return_fields:
             params['return_fields'] = ','.join(return_fields)
-        return self.do_get(entry_point, params)
+        return self.cached_get(entry_point, params)
+
+    def collection_get_many(self, ids, return_fields=[],
+                            concurrency=DEFAULT_CONCURRENCY):
+        """
+        Retrieve many collections at once, sending several requests in
+        parallel.
+
+        :param list ids: your collection ids
+        :param list return_fields: the same as for :meth:`collection_get`
+        :param int concurrency: how many requests to send at the same time, at most the ``pool_maxsize`` of the client
+        :returns: one :class:`yumpu_sdk.batch.BatchResult` per id, in the same order as ``ids``
+        :rtype: list
+        """
+        return run_many(lambda id: self.collection_get(id, return_fields),
+                        ids, self.batch_concurrency(concurrency))
 
     def collection_post(self, name):
         """
@@ -760,7 +1255,22 @@ class Yumpu():
         }
         if return_fields:
             params['return_fields'] = ','.join(return_fields)
-        return self.do_get(entry_point, params)
+        return self.cached_get(entry_point, params)
+
+    def section_get_many(self, ids, return_fields=[],
+                         concurrency=DEFAULT_CONCURRENCY):
+        """
+        Retrieve many sections at once, sending several requests in
+        parallel.
+
+        :param list ids: your section ids
+        :param list return_fields: the same as for :meth:`section_get`
+        :param int concurrency: how many requests to send at the same time, at most the ``pool_maxsize`` of the client
+        :returns: one :class:`yumpu_sdk.batch.BatchResult` per id, in the same order as ``ids``
+        :rtype: list
+        """
+        return run_many(lambda id: self.section_get(id, return_fields),
+                        ids, self.batch_concurrency(concurrency))
 
     def section_post(self, id, name, description=None, sorting='manually'):
         """
@@ -887,9 +1397,8 @@ class Yumpu():
             'id': id,
             'documents': ','.join(documents)
         }
-        url = "%s%s" % (BASE_URL, entry_point)
-        r = requests.delete(url, headers=self.headers, data=params)
-        return r.json()
+        url = "%s%s" % (self.base_url, entry_point)
+        return self.do_request('DELETE', url, data=params)
 
     def search(self, q, in_=['author', 'title', 'description', 'tags'],
                op='or', offset=0, limit=10,
@@ -922,6 +1431,8 @@ class Yumpu():
         params = {
             'q': q,
             'op': op,
+            'offset': offset,
+            'limit': limit,
             'sort': sort,
             'language': language,
             'pages': pages,
@@ -934,7 +1445,53 @@ class Yumpu():
             params['in'] = ','.join(in_)
         if return_fields:
             params['return_fields'] = ','.join(return_fields)
-        return self.do_get(entry_point, params, SEARCH_URL)
+        return self.search_get(entry_point, params)
+
+    def search_get(self, entry_point, params):
+        """
+        Send a search, through the search cache of the client if it has
+        one.
+        """
+        if self.search_cache is None:
+            return self.do_get(entry_point, params, self.search_url)
+        return self.search_cache.fetch(
+            params, lambda: self.do_get(entry_point, params, self.search_url))
+
+    def iter_search(self, q, in_=['author', 'title', 'description', 'tags'],
+                    op='or',
+                    return_fields=[
+                        'id', 'url', 'short_url', 'image_small',
+                        'image_medium', 'image_big', 'language', 'title',
+                        'description', 'tags', 'embed_code'
+                    ],
+                    sort=None, offset=0, page_size=MAX_LIMIT, prefetch=False,
+                    **filters):
+        """
+        Iterate over all the results of a search, requesting them page by
+        page only when they are needed. The iteration stops at the
+        ``total`` given by the first response.
+
+        :param str q: A keyword to search for
+        :param list in_: the same as for :meth:`search`
+        :param str op: Search keyword with „and“ or „or“ operator
+        :param list return_fields: the same as for :meth:`search`
+        :param str sort: the same as for :meth:`search`
+        :param int offset: Start from the result at position X. Default is 0.
+        :param int page_size: How many results to request at once (max. 100)
+        :param bool prefetch: Request the next page while the current one is consumed
+        :param filters: language, pages, heat_rank, views, create_date or category, as for :meth:`search`
+        :returns: a generator of documents
+
+        >>> from yumpu_sdk.api import Yumpu
+        >>> yumpu = Yumpu('YOUR_TOKEN_HERE')
+        >>> for document in yumpu.iter_search('garden', language='de',
+        ...                                   prefetch=True):
+        ...     print(document['url'])
+        """
+        def fetch(offset, limit):
+            return self.search(q, in_, op, offset, limit, return_fields, sort,
+                               **filters)
+        return iter_pages(fetch, 'documents', offset, page_size, prefetch)
 
     def user_get(self, return_fields=[]):
         """
@@ -970,6 +1527,23 @@ class Yumpu():
         entry_point = '/user.json'
         return self.do_put(entry_point, kwargs)
 
+    def user_put_changes(self, user=None, **kwargs):
+        """
+        The same as :meth:`user_put`, but sending only the parameters
+        differing from your current profile, and no request at all when
+        none does.
+
+        :param dict user: your current profile; fetched with :meth:`user_get` if not given
+        :returns: the result of request, or None if nothing changed
+        :rtype: json
+        """
+        if user is None:
+            user = current_record(self.user_get(), 'user')
+        changed = changes(user, kwargs, USER_PUT_FIELDS)
+        if not changed:
+            return None
+        return self.user_put(**changed)
+
     def user_post(self, **kwargs):
         """
         Create a new user profile.
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for sending many similar requests to Yumpu API at once.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from .exceptions import YumpuError
+
+
+DEFAULT_CONCURRENCY = 8
+
+
+class BatchResult(object):
+    """
+    The outcome of one item of a batch. ``response`` holds the decoded
+    response on success, ``error`` holds the exception on failure.
+    """
+    __slots__ = ('id', 'response', 'error')
+
+    def __init__(self, id, response=None, error=None):
+        self.id = id
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return '<BatchResult %s: success>' % (self.id,)
+        return '<BatchResult %s: %r>' % (self.id, self.error)
+
+
+def check_response(response):
+    """
+    Raise :class:`YumpuError` if Yumpu API answered with an error state.
+    """
+    if not isinstance(response, dict):
+        return response
+    if response.get('state', 'success') != 'success':
+        raise YumpuError(response)
+    return response
+
+
+def run_one(func, id):
+    try:
+        return BatchResult(id, check_response(func(id)))
+    except Exception as e:
+        return BatchResult(id, error=e)
+
+
+def run_many(func, ids, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Call ``func`` for every id using a pool of worker threads.
+
+    :param func: a callable taking one id and returning the decoded response
+    :param list ids: the ids to process
+    :param int concurrency: how many requests to send at the same time
+    :returns: one :class:`BatchResult` per id, in the same order as ``ids``
+    :rtype: list
+    """
+    ids = list(ids)
+    if not ids:
+        return []
+    workers = max(1, min(concurrency, len(ids)))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        return list(executor.map(lambda id: run_one(func, id), ids))
+    finally:
+        executor.shutdown(wait=True)
@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+Caches for the responses of Yumpu API.
+"""
+import collections
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .hooks import entry_point as url_entry_point
+from .models import plain
+
+
+def write_json(path, data):
+    """
+    Write data as JSON to a file, replacing it atomically, so concurrent
+    readers never see a half written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, default=plain)
+        getattr(os, 'replace', os.rename)(tmp, path)
+    except Exception:
+        os.unlink(tmp)
+        raise
+
+
+class TTLCache(object):
+    """
+    A thread safe in memory cache where every entry expires ``ttl``
+    seconds after it was stored.
+
+    :param float ttl: how many seconds an entry is valid
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :returns: the cached value, or None if it's missing or expired
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self.entries[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl
+        with self.lock:
+            self.entries[key] = (time.time() + ttl, value)
+
+    def invalidate(self, key=None):
+        """
+        Forget one entry, or all of them if no key is given.
+        """
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+
+class DiskCache(object):
+    """
+    A cache keeping every entry in a JSON file of a directory, so it's
+    shared between processes and survives restarts. Files are replaced
+    atomically, so concurrent readers never see a half written entry.
+
+    :param str directory: where to keep the files; it's created if missing
+    :param float ttl: how many seconds an entry is valid
+    """
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+
+    def path(self, key):
+        name = ''.join(c if c.isalnum() else '_' for c in key.strip('/'))
+        return os.path.join(self.directory, name + '.json')
+
+    def get(self, key):
+        """
+        :returns: the cached value, or None if it's missing or expired
+        """
+        try:
+            with open(self.path(key)) as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if entry.get('expires', 0) < time.time():
+            return None
+        return entry.get('value')
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl
+        entry = {'expires': time.time() + ttl, 'value': value}
+        write_json(self.path(key), entry)
+
+    def invalidate(self, key=None):
+        """
+        Forget one entry, or all of them if no key is given.
+        """
+        if key is not None:
+            paths = [self.path(key)]
+        else:
+            paths = [os.path.join(self.directory, name)
+                     for name in os.listdir(self.directory)
+                     if name.endswith('.json')]
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+class ReferenceCache(object):
+    """
+    The cache of the near static lists of Yumpu: categories, languages and
+    countries. Entries are kept in memory and, if a directory is given, on
+    disk too, so a new worker process doesn't need to request them again.
+
+    Every read returns a copy, so changing a returned response doesn't
+    change the cache.
+
+    :param float ttl: how many seconds an entry is valid
+    :param str directory: where to keep the entries on disk (optional)
+    """
+
+    def __init__(self, ttl=24 * 60 * 60, directory=None):
+        self.memory = TTLCache(ttl)
+        self.disk = DiskCache(directory, ttl) if directory else None
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        self.memory.set(key, copy.deepcopy(value))
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def invalidate(self, key=None):
+        self.memory.invalidate(key)
+        if self.disk is not None:
+            self.disk.invalidate(key)
+
+
+# What each change made through the API makes stale: for an entry point and
+# a verb, the cached entry points to forget, either only for the id of the
+# request or all of them (None).
+INVALIDATIONS = {
+    ('/document.json', 'PUT'): [('/document.json', 'id')],
+    ('/document.json', 'DELETE'): [
+        ('/document.json', 'id'), ('/collection/section.json', None),
+    ],
+    ('/collection.json', 'PUT'): [('/collection.json', 'id')],
+    ('/collection.json', 'DELETE'): [
+        ('/collection.json', 'id'), ('/collection/section.json', None),
+    ],
+    ('/collection/section.json', 'POST'): [('/collection.json', 'id')],
+    ('/collection/section.json', 'PUT'): [
+        ('/collection/section.json', 'id'), ('/collection.json', None),
+    ],
+    ('/collection/section.json', 'DELETE'): [
+        ('/collection/section.json', 'id'), ('/collection.json', None),
+    ],
+    ('/collection/section/document.json', 'POST'): [
+        ('/collection/section.json', 'id'),
+    ],
+    ('/collection/section/document.json', 'DELETE'): [
+        ('/collection/section.json', 'id'),
+    ],
+}
+
+
+class ResponseCache(object):
+    """
+    A size bounded LRU cache for the responses of :meth:`document_get`,
+    :meth:`collection_get` and :meth:`section_get`, keyed by the entry
+    point and all the params (``return_fields`` included).
+
+    Fresh entries are served without any request. Expired entries are kept
+    while the server gave an ``ETag`` or a ``Last-Modified`` header for
+    them, and are revalidated with a conditional request; a ``304 Not
+    Modified`` answer renews them without sending the body again.
+
+    The changes made through the same client (``document_put``,
+    ``document_delete``, ``collection_put``, ``section_document_post``...)
+    invalidate the affected entries.
+
+    :param int maxsize: the maximum number of cached responses
+    :param float ttl: how many seconds a response is served without asking the server
+
+    >>> from yumpu_sdk.api import Yumpu
+    >>> from yumpu_sdk.cache import ResponseCache
+    >>> yumpu = Yumpu('YOUR_TOKEN_HERE',
+    ...               response_cache=ResponseCache(maxsize=5000, ttl=600))
+    """
+
+    def __init__(self, maxsize=1000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()
+        self.by_id = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @staticmethod
+    def key(entry_point, params):
+        return (entry_point, tuple(sorted(
+            (k, str(v)) for k, v in params.items() if v is not None
+        )))
+
+    def lookup(self, key):
+        """
+        :returns: a ``(response, fresh, validators)`` tuple, or None if the response is not cached
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, response, validators = entry
+            fresh = expires >= time.time()
+            if not fresh and not validators:
+                self.drop(key)
+                self.misses += 1
+                return None
+            # Put it back at the end, as the most recently used entry.
+            self.entries[key] = self.entries.pop(key)
+            if fresh:
+                self.hits += 1
+            return copy.deepcopy(response), fresh, dict(validators)
+
+    def store(self, key, response, validators=None):
+        with self.lock:
+            self.drop(key)
+            self.entries[key] = (time.time() + self.ttl,
+                                 copy.deepcopy(response),
+                                 dict(validators or {}))
+            self.by_id.setdefault(self.id_key(key), set()).add(key)
+            while len(self.entries) > self.maxsize:
+                self.drop(next(iter(self.entries)))
+
+    def renew(self, key):
+        """
+        Mark a revalidated entry as fresh again.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries[key] = (time.time() + self.ttl,) + entry[1:]
+                self.revalidations += 1
+
+    @staticmethod
+    def id_key(key):
+        entry_point, params = key
+        return entry_point, dict(params).get('id')
+
+    def drop(self, key):
+        if self.entries.pop(key, None) is not None:
+            keys = self.by_id.get(self.id_key(key))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_id[self.id_key(key)]
+
+    def invalidate(self, entry_point=None, id=None):
+        """
+        Forget the cached responses of an entry point, only the ones for
+        one id if given, or all the responses if nothing is given.
+        """
+        with self.lock:
+            if entry_point is None:
+                self.entries.clear()
+                self.by_id.clear()
+                return
+            if id is not None:
+                keys = list(self.by_id.get((entry_point, str(id)), ()))
+            else:
+                keys = [key for key in self.entries if key[0] == entry_point]
+            for key in keys:
+                self.drop(key)
+
+    def invalidate_for(self, method, url, data):
+        """
+        Forget the responses made stale by a change sent to the API.
+
+        :param str method: the HTTP verb of the change
+        :param str url: the url of the change
+        :param data: the params of the change
+        """
+        # The entry point is matched exactly: /collection/section/document.json
+        # is not a change of /document.json.
+        targets = INVALIDATIONS.get((url_entry_point(url), method.upper()),
+                                    [])
+        for target, id_field in targets:
+            if id_field is None:
+                self.invalidate(target)
+            elif isinstance(data, dict) and data.get(id_field) is not None:
+                self.invalidate(target, data[id_field])
+            else:
+                self.invalidate(target)
+
+
+class Flight(object):
+    """
+    A request in progress, which the threads asking for the same thing wait
+    for instead of sending it again.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class SearchCache(object):
+    """
+    A size bounded LRU cache for the responses of :meth:`search`, where
+    every response expires ``ttl`` seconds after it was stored.
+
+    The queries are normalized before being used as keys: the case and the
+    spaces of ``q``, the order of ``in_`` and of ``return_fields`` and the
+    case of ``op`` don't matter, so ``"Garden  Tools"`` and ``"garden
+    tools"`` share the same entry.
+
+    Identical searches made at the same time from several threads are
+    coalesced: only the first one is sent, the others wait for its response.
+
+    :param int maxsize: the maximum number of cached responses
+    :param float ttl: how many seconds a response is served without asking the server
+
+    >>> from yumpu_sdk.api import Yumpu
+    >>> from yumpu_sdk.cache import SearchCache
+    >>> yumpu = Yumpu('YOUR_TOKEN_HERE',
+    ...               search_cache=SearchCache(maxsize=10000, ttl=60))
+    """
+
+    LISTS = ('in', 'return_fields')
+
+    def __init__(self, maxsize=1000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @classmethod
+    def key(cls, params):
+        """
+        The normalized key of the params of a search.
+        """
+        items = []
+        for name, value in params.items():
+            if value is None:
+                continue
+            if isinstance(value, bytes):
+                value = value.decode('utf-8')
+            if name == 'q':
+                value = ' '.join(value.lower().split())
+            elif name == 'op':
+                value = value.lower()
+            elif name in cls.LISTS:
+                value = ','.join(sorted(set(
+                    item.strip() for item in value.split(',') if item.strip()
+                )))
+            else:
+                value = '%s' % value
+            items.append((name, value))
+        return tuple(sorted(items))
+
+    def get(self, key):
+        """
+        :returns: a copy of the cached response, or None if it's missing or expired
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, response = entry
+            if expires < time.time():
+                del self.entries[key]
+                return None
+            # Put it back at the end, as the most recently used entry.
+            self.entries[key] = self.entries.pop(key)
+            return copy.deepcopy(response)
+
+    def set(self, key, response):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (time.time() + self.ttl,
+                                 copy.deepcopy(response))
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def fetch(self, params, send):
+        """
+        Return the cached response of a search, or call ``send()`` to get
+        it, only once for all the threads asking for it at the same time.
+
+        :param dict params: the params of the search
+        :param send: a callable sending the search and returning its response
+        """
+        key = self.key(params)
+        response = self.get(key)
+        if response is not None:
+            self.hits += 1
+            return response
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.response)
+        try:
+            flight.response = send()
+            if isinstance(flight.response, dict) and \
+                    flight.response.get('state') == 'success':
+                self.set(key, flight.response)
+            return copy.deepcopy(flight.response)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def invalidate(self):
+        """
+        Forget all the cached responses.
+        """
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Comparing the parameters of an update with the current state of a
+document or of the user profile, to send only what changed.
+
+The parameters of :meth:`yumpu_sdk.api.Yumpu.document_put` don't all have
+the names of the fields returned by
+:meth:`yumpu_sdk.api.Yumpu.document_get`: ``visibility`` is
+``settings['privacy_mode']``, ``downloadable`` is
+``settings['site_download_pdf']`` and so on. A parameter without a known
+field, or whose field is missing from the current data, is always sent.
+"""
+from .pagination import page_records
+
+
+# The fields of the documents, per parameter of document_put: a name of
+# the document, or a (settings, name) path.
+DOCUMENT_PUT_FIELDS = {
+    'title': 'title',
+    'description': 'description',
+    'category': 'category',
+    'language': 'language',
+    'tags': 'tags',
+    'access_tags': 'access_tags',
+    'subscriptions': 'subscriptions',
+    'visibility': ('settings', 'privacy_mode'),
+    'blurred': ('settings', 'magazine_premium_blurred_page_range'),
+    'page_teaser_page_range': ('settings', 'magazine_page_teaser_page_range'),
+    'page_teaser_url': ('settings', 'magazine_page_teaser_url'),
+    'downloadable': ('settings', 'site_download_pdf'),
+    'recommended_magazines': ('settings', 'site_recommended_magazines'),
+    'social_sharing': ('settings', 'site_social_sharing'),
+    'player_social_sharing': ('settings', 'player_social_sharing'),
+    'player_download_pdf': ('settings', 'player_download_pdf'),
+    'player_print_page': ('settings', 'player_print_page'),
+    'player_branding': ('settings', 'player_branding'),
+    'player_sidebar': ('settings', 'player_sidebar'),
+    'player_html5_c2r': ('settings', 'player_html5_c2r'),
+    'player_outer_shadow': ('settings', 'player_outer_shadow'),
+    'player_inner_shadow': ('settings', 'player_inner_shadow'),
+    'player_ga': ('settings', 'player_google_analytics_code'),
+    'iap': ('settings', 'appkiosk_iap_sale_item'),
+    'itc_product_id': ('settings', 'appkiosk_itc_product_id'),
+}
+
+USER_PUT_FIELDS = dict((name, name) for name in (
+    'gender', 'firstname', 'lastname', 'birth_date', 'address', 'zip_code',
+    'city', 'country', 'description', 'website', 'blog', 'language'))
+
+# The y or n parameters, returned as booleans.
+FLAGS = frozenset([
+    'downloadable', 'detect_elements', 'recommended_magazines',
+    'social_sharing', 'player_social_sharing', 'player_download_pdf',
+    'player_print_page', 'player_branding', 'player_sidebar',
+    'player_html5_c2r', 'player_outer_shadow', 'player_inner_shadow', 'iap'])
+
+# The comma separated parameters, returned as lists or as False when empty.
+LISTS = frozenset(['tags', 'access_tags', 'subscriptions', 'domains'])
+
+MISSING = object()
+
+
+def lookup(record, path):
+    """
+    The value of a field of a record, ``MISSING`` if it's not there.
+    """
+    if not isinstance(path, tuple):
+        path = (path,)
+    value = record
+    for name in path:
+        try:
+            value = value[name]
+        except (KeyError, IndexError, TypeError):
+            return MISSING
+    return value
+
+
+def normalize(name, value):
+    """
+    Make a parameter and its field comparable: ``'y'`` and True are the
+    same flag, ``'a,b'`` and ``['a', 'b']`` the same list, ``5`` and ``'5'``
+    the same value.
+    """
+    if name in FLAGS:
+        if isinstance(value, bool):
+            return value
+        return u'%s' % value in ('y', 'Y', '1', 'true', 'True')
+    if value is None or value is False:
+        return u''
+    if name in LISTS:
+        if not isinstance(value, (list, tuple)):
+            value = u'%s' % value
+            value = value.split(',') if value else []
+        return u','.join(u'%s' % item for item in value).replace(u', ', u',')
+    return (u'%s' % value).strip()
+
+
+def changes(current, desired, fields):
+    """
+    The parameters differing from the current state.
+
+    :param dict current: the current document or user profile
+    :param dict desired: the parameters of the update
+    :param dict fields: the fields of the parameters (:data:`DOCUMENT_PUT_FIELDS` or :data:`USER_PUT_FIELDS`)
+    :rtype: dict
+    """
+    changed = {}
+    for name, value in desired.items():
+        path = fields.get(name)
+        old = MISSING if path is None else lookup(current, path)
+        if old is MISSING or normalize(name, old) != normalize(name, value):
+            changed[name] = value
+    return changed
+
+
+def current_record(response, key):
+    """
+    The record of a response of Yumpu API, None if it has none.
+
+    :raises YumpuError: if the response has an error state
+    """
+    records = page_records(response, key)
+    return records[0] if records else None
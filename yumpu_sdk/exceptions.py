@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Exceptions raised by the Yumpu SDK.
+"""
+
+
+class YumpuError(Exception):
+    """
+    Raised when Yumpu API answers with an error state. The decoded
+    response is available in the ``response`` attribute.
+    """
+
+    def __init__(self, response):
+        super(YumpuError, self).__init__(
+            response.get('message') or response.get('errors') or response
+        )
+        self.response = response
+
+
+class CassetteError(LookupError):
+    """
+    Raised by :class:`yumpu_sdk.transport.ReplayTransport` for a request
+    which was not recorded in its cassette.
+    """
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+A local full text index of documents, answering the same queries as
+:meth:`yumpu_sdk.api.Yumpu.search` for the documents of an account without
+asking Yumpu API.
+"""
+import re
+import threading
+
+from .index import split_list
+
+
+SEARCH_FIELDS = ('author', 'title', 'description', 'tags')
+WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def tokens(text):
+    """
+    The lowercase words of a text.
+    """
+    if not text:
+        return []
+    if isinstance(text, bytes):
+        text = text.decode('utf-8', 'replace')
+    return WORD.findall(text.lower())
+
+
+def parse_range(value):
+    """
+    Parse a search filter like ``10-20`` or ``30`` (or ``2013-09-01`` and
+    ``2013-09-01-2013-09-30`` for dates) into a ``(low, high)`` tuple.
+    """
+    value = str(value)
+    if re.match(r'^\d{4}-\d{2}-\d{2}', value):
+        low, high = value[:10], value[11:] or value[:10]
+        return low, high + ' 23:59:59'
+    if '-' in value:
+        low, high = value.split('-', 1)
+        return float(low), float(high)
+    return float(value), float(value)
+
+
+def in_range(value, bounds):
+    if value in (None, ''):
+        return False
+    low, high = bounds
+    if not isinstance(low, float):
+        return low <= str(value) <= high
+    try:
+        return low <= float(value) <= high
+    except (TypeError, ValueError):
+        return False
+
+
+def select_fields(document, return_fields):
+    """
+    Keep the requested fields of a document, like Yumpu API does: the
+    ``image_small``, ``image_medium`` and ``image_big`` fields are the
+    sizes of its ``image`` dict.
+    """
+    selected = {}
+    for field in return_fields:
+        if field in document:
+            selected[field] = document[field]
+        elif field.startswith('image_'):
+            image = document.get('image')
+            size = field[len('image_'):]
+            if isinstance(image, dict) and size in image:
+                selected.setdefault('image', {})[size] = image[size]
+    return selected
+
+
+class SearchIndex(object):
+    """
+    An inverted index of the author, title, description and tags of
+    documents. :meth:`search` takes the same arguments as
+    :meth:`yumpu_sdk.api.Yumpu.search` and returns a response of the same
+    shape, so queries about the own documents can be routed to it.
+
+    The author is the ``author`` field of a document, or the one given to
+    :meth:`add_documents` (the username of the account, usually).
+
+    Without ``sort`` the results are ordered by relevance: the number of
+    times the words of the query appear in the searched fields, then the
+    newest first.
+
+    :param str author: the author of the documents without an ``author`` field
+
+    >>> from yumpu_sdk.fulltext import SearchIndex
+    >>> from yumpu_sdk.sync import DOCUMENT_FIELDS
+    >>> index = SearchIndex(author='gnunixon')
+    >>> index.add_documents(yumpu.iter_documents(return_fields=DOCUMENT_FIELDS))
+    >>> index.search('garden', in_=['title', 'tags'], language='de')
+    {'state': 'success', 'total': 2, 'documents': [...]}
+    """
+
+    def __init__(self, author=None):
+        self.author = author
+        self.documents = {}
+        # The indexed words of every document, by field, to unindex it.
+        self.words = {}
+        # field -> word -> document id -> occurrences
+        self.postings = dict((field, {}) for field in SEARCH_FIELDS)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def field_words(self, document, author):
+        tags = ' '.join(split_list(document.get('tags')))
+        return {
+            'author': tokens(document.get('author') or author),
+            'title': tokens(document.get('title')),
+            'description': tokens(document.get('description')),
+            'tags': tokens(tags),
+        }
+
+    def add_documents(self, documents, author=None):
+        """
+        Add documents to the index, replacing the ones with the same id.
+
+        :param documents: an iterable of documents, or a response of documents_get or document_get
+        :param str author: the author of these documents, if they don't say it
+        :returns: how many documents were added
+        :rtype: int
+        """
+        if isinstance(documents, dict):
+            documents = documents.get('documents') or \
+                documents.get('document') or []
+        author = author or self.author
+        count = 0
+        with self.lock:
+            for document in documents:
+                id = str(document['id'])
+                self.unindex(id)
+                self.documents[id] = document
+                self.words[id] = self.field_words(document, author)
+                for field, words in self.words[id].items():
+                    postings = self.postings[field]
+                    for word in words:
+                        hits = postings.setdefault(word, {})
+                        hits[id] = hits.get(id, 0) + 1
+                count += 1
+        return count
+
+    def unindex(self, id):
+        self.documents.pop(id, None)
+        for field, words in self.words.pop(id, {}).items():
+            postings = self.postings[field]
+            for word in set(words):
+                hits = postings.get(word)
+                if hits is not None:
+                    hits.pop(id, None)
+                    if not hits:
+                        del postings[word]
+
+    def remove_documents(self, ids):
+        """
+        Remove documents from the index.
+        """
+        with self.lock:
+            for id in ids:
+                self.unindex(str(id))
+
+    def load_store(self, store):
+        """
+        Index the documents mirrored in a :class:`yumpu_sdk.sync.MemoryStore`,
+        replacing the current content of the index.
+        """
+        with self.lock:
+            self.documents = {}
+            self.words = {}
+            self.postings = dict((field, {}) for field in SEARCH_FIELDS)
+        self.add_documents(store.documents.values())
+
+    def match(self, q, in_, op):
+        """
+        The scores of the documents matching a query, by id.
+        """
+        words = tokens(q)
+        fields = [field for field in (in_ or SEARCH_FIELDS)
+                  if field in self.postings]
+        scores = {}
+        matched = None
+        for word in set(words):
+            found = {}
+            for field in fields:
+                for id, count in self.postings[field].get(word, {}).items():
+                    found[id] = found.get(id, 0) + count
+            for id, count in found.items():
+                scores[id] = scores.get(id, 0) + count
+            if op == 'and':
+                matched = set(found) if matched is None else matched & set(found)
+        if op == 'and':
+            return dict((id, scores[id]) for id in matched or ())
+        return scores
+
+    def search(self, q, in_=['author', 'title', 'description', 'tags'],
+               op='or', offset=0, limit=10,
+               return_fields=[
+                   'id', 'url', 'short_url', 'image_small', 'image_medium',
+                   'image_big', 'language', 'title', 'description', 'tags',
+                   'embed_code'
+               ],
+               sort=None, language=None, pages=None, heat_rank=None,
+               views=None, create_date=None, category=None):
+        """
+        Search the indexed documents, like :meth:`yumpu_sdk.api.Yumpu.search`.
+
+        The ``pages``, ``heat_rank``, ``views`` and ``category`` filters and
+        sorts only match the documents having these fields.
+
+        :rtype: dict
+        """
+        with self.lock:
+            scores = self.match(q, in_, op)
+            documents = [self.documents[id] for id in scores]
+        filters = [('language', language, None),
+                   ('pages', pages, parse_range),
+                   ('heat_rank', heat_rank, parse_range),
+                   ('views', views, parse_range),
+                   ('create_date', create_date, parse_range),
+                   ('category', category, None)]
+        for field, value, parse in filters:
+            if value is None:
+                continue
+            if parse is None:
+                documents = [d for d in documents
+                             if str(d.get(field)) == str(value)]
+            else:
+                bounds = parse(value)
+                documents = [d for d in documents
+                             if in_range(d.get(field), bounds)]
+        documents.sort(key=lambda d: (d.get('create_date') or '',
+                                      str(d['id'])), reverse=True)
+        if sort:
+            field, direction = sort.rsplit('_', 1)
+            documents.sort(key=lambda d: self.sort_key(d, field),
+                           reverse=direction == 'desc')
+        else:
+            documents.sort(key=lambda d: scores[str(d['id'])], reverse=True)
+        page = documents[offset:offset + limit]
+        if return_fields:
+            page = [select_fields(d, return_fields) for d in page]
+        return {'state': 'success', 'total': len(documents),
+                'documents': page}
+
+    def sort_key(self, document, field):
+        value = document.get(field)
+        if field == 'create_date':
+            return value or ''
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return float('-inf')
@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""
+Hooks called around every request sent to Yumpu API, and observers built on
+them measuring where the time goes.
+
+Every client has a :class:`Hooks` in ``yumpu.hooks``. Add plain callbacks
+to its ``before_request`` and ``after_response`` lists, or an observer
+with :meth:`Hooks.add`::
+
+    from yumpu_sdk.hooks import EndpointMetrics
+
+    metrics = yumpu.hooks.add(EndpointMetrics())
+    yumpu.documents_get()
+    print(metrics.report())
+
+The callbacks get a :class:`RequestEvent`. They are called once per
+request, whatever the number of retries, from the thread sending it, so
+they should be quick.
+"""
+import bisect
+import re
+import threading
+import time
+
+
+VERSION_PREFIX = re.compile(r'^/\d+(?:\.\d+)*(?=/)')
+COMPLETED_IN = re.compile(br'"completed_in"\s*:\s*"?([0-9.]+)')
+
+# Upper bounds in seconds of the buckets of the latency histograms.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+           30.0, 60.0)
+
+
+def entry_point(url):
+    """
+    The entry point of an url, like ``/document.json``.
+    """
+    path = url.split('?', 1)[0]
+    if '://' in path:
+        path = '/' + path.split('://', 1)[1].partition('/')[2]
+    return VERSION_PREFIX.sub('', path)
+
+
+def body_size(body):
+    """
+    The size of a request body, 0 if it can't be known.
+    """
+    try:
+        return len(body) if body is not None else 0
+    except TypeError:
+        return 0
+
+
+def completed_in(body):
+    """
+    The ``completed_in`` time reported by the server in a raw response
+    body, in seconds, or None.
+    """
+    if not body:
+        return None
+    match = COMPLETED_IN.search(body)
+    if match is None:
+        return None
+    try:
+        return float(match.group(1))
+    except ValueError:
+        return None
+
+
+class RequestEvent(object):
+    """
+    One request sent to Yumpu API.
+
+    * ``method``, ``url`` and ``entry_point`` - what was requested
+    * ``started`` - the timestamp when the request started
+    * ``duration`` - seconds until the response, retries included
+    * ``status`` - the HTTP status of the response, None on a network error
+    * ``attempts`` - how many times the request was sent
+    * ``bytes_out`` and ``bytes_in`` - the size of the bodies sent and received
+    * ``completed_in`` - the processing time reported by the server, in seconds
+    * ``error`` - the exception of a failed request
+    * ``context`` - a dict where the observers keep their own data
+    """
+    __slots__ = ('method', 'url', 'entry_point', 'started', 'duration',
+                 'status', 'attempts', 'bytes_out', 'bytes_in',
+                 'completed_in', 'error', 'context')
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        self.entry_point = entry_point(url)
+        self.started = time.time()
+        self.duration = None
+        self.status = None
+        self.attempts = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.completed_in = None
+        self.error = None
+        self.context = {}
+
+    def __repr__(self):
+        return '<RequestEvent %s %s %s>' % (self.method, self.entry_point,
+                                            self.status)
+
+
+class Hooks(object):
+    """
+    The callbacks called before every request and after its response.
+    Nothing is measured while both lists are empty.
+    """
+
+    def __init__(self):
+        self.before_request = []
+        self.after_response = []
+
+    def add(self, observer):
+        """
+        Register the ``before_request`` and ``after_response`` methods of an
+        observer, the ones it has.
+
+        :returns: the observer
+        """
+        if hasattr(observer, 'before_request'):
+            self.before_request.append(observer.before_request)
+        if hasattr(observer, 'after_response'):
+            self.after_response.append(observer.after_response)
+        return observer
+
+    def remove(self, observer):
+        for callbacks, name in ((self.before_request, 'before_request'),
+                                (self.after_response, 'after_response')):
+            callback = getattr(observer, name, None)
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def start(self, method, url):
+        """
+        :returns: the event of a new request, or None if nobody listens
+        """
+        if not self.before_request and not self.after_response:
+            return None
+        event = RequestEvent(method, url)
+        for callback in self.before_request:
+            callback(event)
+        return event
+
+    def finish(self, event, status=None, body=None, bytes_out=0, attempts=1,
+               error=None):
+        """
+        Complete the event of a request and call the ``after_response``
+        callbacks, once: an event already finished is left as is.
+        """
+        if event is None or event.duration is not None:
+            return
+        event.duration = time.time() - event.started
+        event.status = status
+        event.attempts = attempts
+        event.bytes_out = bytes_out or 0
+        event.bytes_in = len(body) if body else 0
+        event.completed_in = completed_in(body)
+        event.error = error
+        for callback in self.after_response:
+            callback(event)
+
+
+class Histogram(object):
+    """
+    A histogram of durations in fixed buckets, cheap enough to be updated
+    on every request.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def percentile(self, q):
+        """
+        An estimate of a percentile (0 to 100): the upper bound of the
+        bucket holding it, capped by the largest value seen.
+        """
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class EndpointStats(object):
+    """
+    What :class:`EndpointMetrics` knows about one endpoint.
+    """
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.server_time = Histogram()
+        self.statuses = {}
+        self.errors = 0
+        self.retries = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+    def as_dict(self):
+        return {
+            'latency': self.latency.as_dict(),
+            'server_time': self.server_time.as_dict(),
+            'statuses': dict(self.statuses),
+            'errors': self.errors,
+            'retries': self.retries,
+            'bytes_out': self.bytes_out,
+            'bytes_in': self.bytes_in,
+        }
+
+
+class EndpointMetrics(object):
+    """
+    Collects latency histograms, status counters, payload sizes and the
+    ``completed_in`` time of the server per endpoint (verb and entry point).
+    Thread safe.
+
+    >>> metrics = yumpu.hooks.add(EndpointMetrics())
+    >>> metrics.as_dict()[('GET', '/documents.json')]['latency']['p95']
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self.lock = threading.Lock()
+
+    def after_response(self, event):
+        key = (event.method, event.entry_point)
+        with self.lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            stats.latency.observe(event.duration)
+            if event.completed_in is not None:
+                stats.server_time.observe(event.completed_in)
+            if event.error is not None:
+                stats.errors += 1
+            else:
+                stats.statuses[event.status] = \
+                    stats.statuses.get(event.status, 0) + 1
+            stats.retries += event.attempts - 1
+            stats.bytes_out += event.bytes_out
+            stats.bytes_in += event.bytes_in
+
+    def as_dict(self):
+        with self.lock:
+            return dict((key, stats.as_dict())
+                        for key, stats in self.endpoints.items())
+
+    def report(self):
+        """
+        A text table of the endpoints, the ones taking the most time in
+        total first.
+        """
+        rows = sorted(self.as_dict().items(),
+                      key=lambda item: -item[1]['latency']['sum'])
+        lines = ['%-6s %-36s %7s %9s %9s %9s %9s %6s' % (
+            'verb', 'entry point', 'count', 'total s', 'p50 ms', 'p95 ms',
+            'server ms', 'errors')]
+        for (method, entry_point), stats in rows:
+            latency = stats['latency']
+            server = stats['server_time']['mean']
+            errors = stats['errors'] + sum(
+                count for status, count in stats['statuses'].items()
+                if status >= 400)
+            lines.append('%-6s %-36s %7d %9.2f %9.1f %9.1f %9s %6d' % (
+                method, entry_point, latency['count'], latency['sum'],
+                latency['p50'] * 1000, latency['p95'] * 1000,
+                '-' if server is None else '%.1f' % (server * 1000),
+                errors))
+        return '\n'.join(lines)
+
+
+class PrometheusMetrics(object):
+    """
+    Exports the requests as Prometheus metrics. It needs the
+    prometheus_client package::
+
+        pip install prometheus_client
+
+    :param str prefix: the prefix of the names of the metrics
+    :param registry: the registry of the metrics, the default one if not given
+    """
+
+    def __init__(self, prefix='yumpu', registry=None):
+        import prometheus_client
+        kwargs = {}
+        if registry is not None:
+            kwargs['registry'] = registry
+        labels = ['method', 'entry_point']
+        self.latency = prometheus_client.Histogram(
+            prefix + '_request_duration_seconds',
+            'Duration of the requests to Yumpu API, retries included',
+            labels, buckets=BUCKETS, **kwargs)
+        self.server_time = prometheus_client.Histogram(
+            prefix + '_server_duration_seconds',
+            'Processing time reported by Yumpu API (completed_in)',
+            labels, buckets=BUCKETS, **kwargs)
+        self.requests = prometheus_client.Counter(
+            prefix + '_requests_total', 'Requests to Yumpu API',
+            labels + ['status'], **kwargs)
+        self.bytes = prometheus_client.Counter(
+            prefix + '_bytes_total', 'Bytes exchanged with Yumpu API',
+            labels + ['direction'], **kwargs)
+
+    def after_response(self, event):
+        labels = (event.method, event.entry_point)
+        self.latency.labels(*labels).observe(event.duration)
+        if event.completed_in is not None:
+            self.server_time.labels(*labels).observe(event.completed_in)
+        status = 'error' if event.error is not None else str(event.status)
+        self.requests.labels(*labels + (status,)).inc()
+        self.bytes.labels(*labels + ('out',)).inc(event.bytes_out)
+        self.bytes.labels(*labels + ('in',)).inc(event.bytes_in)
+
+
+class OpenTelemetryTracer(object):
+    """
+    Makes an OpenTelemetry span of every request. It needs the
+    opentelemetry-api package::
+
+        pip install opentelemetry-api
+
+    :param tracer: the tracer making the spans, the one of this package if not given
+    """
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace
+        self.trace = trace
+        self.tracer = tracer or trace.get_tracer('yumpu_sdk')
+
+    def before_request(self, event):
+        event.context['span'] = self.tracer.start_span(
+            'yumpu %s %s' % (event.method, event.entry_point),
+            kind=self.trace.SpanKind.CLIENT,
+            attributes={'http.method': event.method, 'http.url': event.url})
+
+    def after_response(self, event):
+        span = event.context.pop('span', None)
+        if span is None:
+            return
+        if event.status is not None:
+            span.set_attribute('http.status_code', event.status)
+        span.set_attribute('yumpu.attempts', event.attempts)
+        span.set_attribute('yumpu.bytes_out', event.bytes_out)
+        span.set_attribute('yumpu.bytes_in', event.bytes_in)
+        if event.completed_in is not None:
+            span.set_attribute('yumpu.completed_in', event.completed_in)
+        if event.error is not None:
+            span.record_exception(event.error)
+            span.set_status(self.trace.Status(self.trace.StatusCode.ERROR))
+        elif event.status is not None and event.status >= 400:
+            span.set_status(self.trace.Status(self.trace.StatusCode.ERROR))
+        span.end()
@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+"""
+Creating, updating, deleting and exporting the hotspots of documents in
+bulk, from and to CSV or JSON files.
+
+Hotspots are handled as flat rows, with the settings of the API as
+columns::
+
+    id,document_id,page,type,x,y,w,h,name,tooltip,link,...
+
+A row without ``id`` is created, a row with an ``id`` is updated, and a
+row with ``action`` set to ``delete`` is deleted. The files written by
+:func:`export_hotspots` can be edited and imported again.
+"""
+import csv
+import io
+import json
+import os
+
+from .batch import DEFAULT_CONCURRENCY, run_many
+from .multipart import text_type
+from .ratelimit import TokenBucket
+
+
+HOTSPOT_FIELDS = ['id', 'document_id', 'page', 'type', 'settings',
+                  'create_date', 'update_date']
+SETTINGS = ['x', 'y', 'w', 'h', 'name', 'tooltip', 'link', 'source',
+            'source_id', 'source_url', 'autoplay']
+COLUMNS = ['id', 'document_id', 'page', 'type'] + SETTINGS + ['action']
+# The columns compared as numbers.
+NUMBERS = ('page', 'x', 'y', 'w', 'h')
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+CHUNK_SIZE = 1000
+
+
+def flatten(hotspot):
+    """
+    Turn a hotspot of Yumpu API (with its ``settings`` dict) into a row.
+    """
+    row = dict((column, hotspot.get(column))
+               for column in ('id', 'document_id', 'page', 'type'))
+    settings = hotspot.get('settings') or {}
+    for name in SETTINGS:
+        row[name] = settings.get(name, hotspot.get(name))
+    return row
+
+
+def clean_row(row):
+    """
+    Empty cells of CSV files are missing values.
+    """
+    return dict((key, None if value == '' else value)
+                for key, value in row.items() if key)
+
+
+def guess_format(path, format=None):
+    if format is not None:
+        return format
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('csv', 'json', 'jsonl'):
+        return extension
+    raise ValueError('Unknown hotspots format: %s' % path)
+
+
+def read_hotspots(source, format=None):
+    """
+    Read hotspot rows from a file, lazily for CSV and JSON lines files, so
+    big files are never fully in memory.
+
+    :param source: a path, or a file object opened in text mode
+    :param str format: csv, json (a list of objects) or jsonl (one object per line), guessed from the name of the path if not given
+    :returns: a generator of rows
+    """
+    if isinstance(source, (str, text_type)):
+        format = guess_format(source, format)
+        with io.open(source, encoding='utf-8', newline='') as f:
+            for row in read_hotspots(f, format):
+                yield row
+        return
+    if format == 'csv':
+        for row in csv.DictReader(source):
+            yield clean_row(row)
+    elif format == 'jsonl':
+        for line in source:
+            if line.strip():
+                yield flatten_record(json.loads(line))
+    elif format == 'json':
+        for record in json.load(source):
+            yield flatten_record(record)
+    else:
+        raise ValueError('Unknown hotspots format: %s' % format)
+
+
+def flatten_record(record):
+    if isinstance(record.get('settings'), dict):
+        flat = flatten(record)
+        if 'action' in record:
+            flat['action'] = record['action']
+        return flat
+    return record
+
+
+def write_hotspots(rows, target, format=None):
+    """
+    Write hotspot rows to a file.
+
+    :param rows: an iterable of rows (or of hotspots of Yumpu API)
+    :param target: a path, or a file object opened in text mode
+    :param str format: csv, json or jsonl, guessed from the name of the path if not given
+    :returns: how many rows were written
+    :rtype: int
+    """
+    if isinstance(target, (str, text_type)):
+        format = guess_format(target, format)
+        with io.open(target, 'w', encoding='utf-8', newline='') as f:
+            return write_hotspots(rows, f, format)
+    count = 0
+    if format == 'csv':
+        writer = csv.DictWriter(target, COLUMNS[:-1], extrasaction='ignore')
+        writer.writeheader()
+    elif format == 'json':
+        target.write(u'[')
+    elif format != 'jsonl':
+        raise ValueError('Unknown hotspots format: %s' % format)
+    for row in rows:
+        row = flatten_record(row)
+        if format == 'csv':
+            writer.writerow(row)
+        else:
+            data = json.dumps(dict((key, row.get(key)) for key in COLUMNS[:-1]
+                                   if row.get(key) is not None))
+            if format == 'json':
+                data = (u',\n' if count else u'\n') + data
+            else:
+                data += u'\n'
+            target.write(data)
+        count += 1
+    if format == 'json':
+        target.write(u'\n]\n')
+    return count
+
+
+def row_action(row):
+    action = (row.get('action') or '').lower()
+    if action:
+        return action
+    return UPDATE if row.get('id') else CREATE
+
+
+def apply_row(yumpu, row, document_id=None):
+    """
+    Send the request creating, updating or deleting the hotspot of a row.
+    """
+    action = row_action(row)
+    if action == DELETE:
+        return yumpu.document_hotspot_delete(row['id'])
+    settings = [row.get(name) for name in SETTINGS]
+    if action == UPDATE:
+        return yumpu.document_hotspot_put(row['id'], row.get('page'),
+                                          row.get('type'), *settings)
+    if action == CREATE:
+        if settings[-1] is None:
+            settings[-1] = 'n'
+        return yumpu.document_hotspot_post(
+            document_id or row.get('document_id'), row.get('page'),
+            row.get('type'), *settings)
+    raise ValueError('Unknown hotspot action: %s' % action)
+
+
+def import_hotspots(yumpu, rows, document_id=None,
+                    concurrency=DEFAULT_CONCURRENCY, rate=None,
+                    chunk_size=CHUNK_SIZE):
+    """
+    Create, update and delete hotspots in bulk, sending several requests
+    at the same time. The rows are consumed ``chunk_size`` at a time, so
+    a streamed file of any size takes constant memory.
+
+    The requests go through the rate limiter of the client, if it has one;
+    ``rate`` limits this import only, for example to leave room for other
+    work of the same account.
+
+    :param yumpu: a :class:`yumpu_sdk.api.Yumpu` client
+    :param rows: an iterable of rows, for example from :func:`read_hotspots`
+    :param document_id: the document the hotspots are created on, whatever their ``document_id``; the ``document_id`` of the rows if not given
+    :param int concurrency: how many requests to send at the same time
+    :param float rate: how many requests to send per second at most
+    :param int chunk_size: how many rows to read at once
+    :returns: a generator of one :class:`yumpu_sdk.batch.BatchResult` per row, in the same order, with the row as ``id``
+
+    >>> from yumpu_sdk.hotspots import import_hotspots, read_hotspots
+    >>> results = import_hotspots(yumpu, read_hotspots('hotspots.csv'),
+    ...                           concurrency=16, rate=20)
+    >>> failed = [result for result in results if not result.ok]
+    """
+    bucket = TokenBucket(rate, max(1, concurrency)) if rate else None
+
+    def send(row):
+        if bucket is not None:
+            bucket.acquire()
+        return apply_row(yumpu, row, document_id)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            for result in run_many(send, chunk, concurrency):
+                yield result
+            chunk = []
+    for result in run_many(send, chunk, concurrency):
+        yield result
+
+
+def export_hotspots(yumpu, document_id, target, format=None, page=None):
+    """
+    Write all the hotspots of a document to a file, in a format
+    :func:`read_hotspots` and :func:`import_hotspots` take back.
+
+    :param yumpu: a :class:`yumpu_sdk.api.Yumpu` client
+    :param int document_id: the id of one of your documents
+    :param target: a path, or a file object opened in text mode
+    :param str format: csv, json or jsonl, guessed from the name of the path if not given
+    :param int page: export only the hotspots of this page
+    :returns: how many hotspots were written
+    :rtype: int
+    """
+    hotspots = yumpu.iter_hotspots(document_id, page,
+                                   return_fields=HOTSPOT_FIELDS,
+                                   prefetch=True)
+    rows = (dict(flatten(hotspot),
+                 document_id=hotspot.get('document_id') or document_id)
+            for hotspot in hotspots)
+    return write_hotspots(rows, target, format)
+
+
+def normalize(name, value):
+    """
+    Make the values of files and of the API comparable: ``''`` and None are
+    the same, and for the position, ``'30'``, ``30`` and ``30.0`` are the
+    same too. The other settings are compared as text, so ids made of
+    digits are never rounded.
+    """
+    if value is None or value == '':
+        return None
+    if name in NUMBERS:
+        try:
+            return repr(float(value))
+        except (TypeError, ValueError):
+            pass
+    return u'%s' % value
+
+
+def content_key(row):
+    return tuple(normalize(name, row.get(name)) for name in
+                 ['page', 'type'] + SETTINGS)
+
+
+def geometry_key(row):
+    return tuple(normalize(name, row.get(name)) for name in NUMBERS)
+
+
+def name_key(row):
+    return (normalize('page', row.get('page')),
+            normalize('name', row.get('name')))
+
+
+def match(current, desired, key):
+    """
+    Pair the rows of both lists having the same key, removing them from the
+    lists.
+    """
+    by_key = {}
+    for row in current:
+        by_key.setdefault(key(row), []).append(row)
+    pairs = []
+    unmatched = []
+    for row in desired:
+        candidates = by_key.get(key(row))
+        if candidates:
+            pairs.append((candidates.pop(0), row))
+        else:
+            unmatched.append(row)
+    paired = set(id(old) for old, new in pairs)
+    current[:] = [row for row in current if id(row) not in paired]
+    desired[:] = unmatched
+    return pairs
+
+
+def plan_hotspots(current, desired, document_id=None):
+    """
+    Find the minimal changes turning the current hotspots of a document
+    into the desired ones.
+
+    The hotspots are paired by id when the desired ones have it, then the
+    identical ones, then the ones at the same place of the same page, then
+    the ones with the same name on the same page. The pairs differing are
+    updated, the desired hotspots left are created and the current ones
+    left are deleted.
+
+    :param list current: the current hotspots, as rows or hotspots of Yumpu API
+    :param list desired: the desired hotspots, as rows or hotspots of Yumpu API
+    :param document_id: the document the hotspots are created on, whatever their ``document_id``; the ``document_id`` of the rows if not given
+    :returns: the rows to give to :func:`import_hotspots`, and how many hotspots are unchanged
+    :rtype: tuple
+    """
+    current = [flatten_record(row) for row in current]
+    desired = [flatten_record(row) for row in desired]
+    known = set(str(row['id']) for row in current if row.get('id'))
+    pairs = match(current, [row for row in desired
+                            if row.get('id') and str(row['id']) in known],
+                  lambda row: str(row['id']))
+    desired = [row for row in desired
+               if not row.get('id') or str(row['id']) not in known]
+    for key in (content_key, geometry_key, name_key):
+        pairs.extend(match(current, desired, key))
+    changes = []
+    unchanged = 0
+    for old, new in pairs:
+        if content_key(old) == content_key(new):
+            unchanged += 1
+        else:
+            changes.append(dict(new, id=old['id'], action=UPDATE))
+    for row in desired:
+        # A layout exported from another document carries its id, the
+        # hotspots are still created on the reconciled one.
+        changes.append(dict(row, id=None, action=CREATE,
+                            document_id=document_id or
+                            row.get('document_id')))
+    for row in current:
+        changes.append({'id': row['id'], 'action': DELETE})
+    return changes, unchanged
+
+
+def reconcile_hotspots(yumpu, document_id, desired,
+                       concurrency=DEFAULT_CONCURRENCY, rate=None,
+                       dry_run=False):
+    """
+    Make the hotspots of a document match the desired ones, sending only
+    the creates, updates and deletes needed (see :func:`plan_hotspots`).
+    Re-applying a layout where a few hotspots changed costs a few writes,
+    instead of deleting and creating all of them again.
+
+    :param yumpu: a :class:`yumpu_sdk.api.Yumpu` client
+    :param int document_id: the id of one of your documents
+    :param desired: an iterable of rows or of hotspots of Yumpu API, for example from :func:`read_hotspots`
+    :param int concurrency: how many requests to send at the same time
+    :param float rate: how many requests to send per second at most
+    :param bool dry_run: only compute the changes, without sending them
+    :returns: the counts of the changes, the ``plan`` and the ``errors`` (failed :class:`yumpu_sdk.batch.BatchResult`)
+    :rtype: dict
+
+    >>> from yumpu_sdk.hotspots import read_hotspots, reconcile_hotspots
+    >>> reconcile_hotspots(yumpu, 53312964, read_hotspots('layout.csv'))
+    {'create': 2, 'update': 1, 'delete': 0, 'unchanged': 1497, ...}
+    """
+    current = yumpu.iter_hotspots(document_id, return_fields=HOTSPOT_FIELDS,
+                                  prefetch=True)
+    changes, unchanged = plan_hotspots(list(current), list(desired),
+                                       document_id)
+    summary = {CREATE: 0, UPDATE: 0, DELETE: 0, 'unchanged': unchanged,
+               'plan': changes, 'errors': []}
+    for row in changes:
+        summary[row['action']] += 1
+    if not dry_run:
+        for result in import_hotspots(yumpu, changes, document_id,
+                                      concurrency, rate):
+            if not result.ok:
+                summary['errors'].append(result)
+    return summary
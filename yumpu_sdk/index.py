@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+A local SQLite index of documents, for answering questions like "all the
+documents in german tagged with garden created last month" without asking
+Yumpu API.
+"""
+import json
+import sqlite3
+import threading
+
+from .models import plain
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    language TEXT,
+    title TEXT,
+    create_date TEXT,
+    update_date TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_language ON documents (language);
+CREATE INDEX IF NOT EXISTS documents_create_date ON documents (create_date);
+CREATE INDEX IF NOT EXISTS documents_update_date ON documents (update_date);
+CREATE TABLE IF NOT EXISTS document_tags (
+    document_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, document_id)
+);
+CREATE INDEX IF NOT EXISTS document_tags_document
+    ON document_tags (document_id);
+CREATE TABLE IF NOT EXISTS section_documents (
+    section_id TEXT NOT NULL,
+    collection_id TEXT,
+    document_id TEXT NOT NULL,
+    PRIMARY KEY (section_id, document_id)
+);
+CREATE INDEX IF NOT EXISTS section_documents_document
+    ON section_documents (document_id);
+CREATE INDEX IF NOT EXISTS section_documents_collection
+    ON section_documents (collection_id);
+'''
+
+SORTS = {
+    'create_date_desc': 'create_date DESC',
+    'create_date_asc': 'create_date ASC',
+    'update_date_desc': 'update_date DESC',
+    'update_date_asc': 'update_date ASC',
+    'title_asc': 'title ASC',
+    'title_desc': 'title DESC',
+}
+
+
+def split_list(value):
+    """
+    Yumpu gives lists either as False, as a comma separated string or as a
+    real list; always return a list of strings.
+    """
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        items = []
+        for item in value:
+            if isinstance(item, dict):
+                item = item.get('id', item.get('name'))
+            if item not in (None, ''):
+                items.append(str(item).strip())
+        return items
+    return [item.strip() for item in str(value).split(',') if item.strip()]
+
+
+class DocumentIndex(object):
+    """
+    Indexes the documents returned by this SDK (``documents_get``,
+    ``document_get``, :class:`yumpu_sdk.sync.Mirror`...) by id, language,
+    tags, dates and collection and section membership. Queries return the
+    documents exactly as they were loaded, the same dicts as in the
+    responses of :meth:`yumpu_sdk.api.Yumpu.document_get`.
+
+    :param str path: the SQLite database file, in memory by default
+
+    >>> from yumpu_sdk.index import DocumentIndex
+    >>> from yumpu_sdk.sync import DOCUMENT_FIELDS
+    >>> index = DocumentIndex('/var/lib/yumpu/index.sqlite')
+    >>> index.add_documents(yumpu.iter_documents(return_fields=DOCUMENT_FIELDS))
+    >>> index.query(language='de', tag='garden',
+    ...             created_from='2015-08-01', created_to='2015-08-31')
+    """
+
+    def __init__(self, path=':memory:'):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_documents(self, documents):
+        """
+        Add documents to the index, replacing the ones with the same id.
+
+        :param documents: an iterable of documents, or a response of documents_get or document_get
+        :returns: how many documents were added
+        :rtype: int
+        """
+        if isinstance(documents, dict):
+            documents = documents.get('documents') or \
+                documents.get('document') or []
+        count = 0
+        with self.lock, self.connection:
+            for document in documents:
+                id = str(document['id'])
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)',
+                    (id, document.get('language'), document.get('title'),
+                     document.get('create_date'), document.get('update_date'),
+                     json.dumps(document, default=plain))
+                )
+                self.connection.execute(
+                    'DELETE FROM document_tags WHERE document_id = ?', (id,))
+                self.connection.executemany(
+                    'INSERT OR IGNORE INTO document_tags VALUES (?, ?)',
+                    [(id, tag.lower())
+                     for tag in split_list(document.get('tags'))]
+                )
+                count += 1
+        return count
+
+    def remove_documents(self, ids):
+        """
+        Remove documents from the index.
+        """
+        ids = [(str(id),) for id in ids]
+        with self.lock, self.connection:
+            for table, column in (('documents', 'id'),
+                                  ('document_tags', 'document_id'),
+                                  ('section_documents', 'document_id')):
+                self.connection.executemany(
+                    'DELETE FROM %s WHERE %s = ?' % (table, column), ids)
+
+    def add_sections(self, sections, collection_id=None):
+        """
+        Record which documents belong to which sections.
+
+        :param sections: an iterable of sections (as returned by section_get, or stored by :class:`yumpu_sdk.sync.Mirror` with their ``collection_id``)
+        :param str collection_id: the collection of the sections, if they don't say it
+        """
+        with self.lock, self.connection:
+            for section in sections:
+                id = str(section['id'])
+                parent = section.get('collection_id', collection_id)
+                self.connection.execute(
+                    'DELETE FROM section_documents WHERE section_id = ?', (id,))
+                self.connection.executemany(
+                    'INSERT OR IGNORE INTO section_documents VALUES (?, ?, ?)',
+                    [(id, parent, document_id)
+                     for document_id in split_list(section.get('documents'))]
+                )
+
+    def load_store(self, store):
+        """
+        Index everything mirrored in a :class:`yumpu_sdk.sync.MemoryStore`,
+        replacing the current content of the index.
+        """
+        with self.lock, self.connection:
+            for table in ('documents', 'document_tags', 'section_documents'):
+                self.connection.execute('DELETE FROM %s' % table)
+        self.add_documents(store.documents.values())
+        self.add_sections(store.sections.values())
+
+    def where(self, ids=None, language=None, tag=None, tags=None,
+              created_from=None, created_to=None, updated_from=None,
+              updated_to=None, collection_id=None, section_id=None):
+        clauses = []
+        args = []
+        if ids is not None:
+            ids = [str(id) for id in ids]
+            clauses.append('id IN (%s)' % ','.join('?' * len(ids)))
+            args.extend(ids)
+        if language is not None:
+            clauses.append('language = ?')
+            args.append(language)
+        for value in ([tag] if tag else []) + list(tags or []):
+            clauses.append('id IN (SELECT document_id FROM document_tags '
+                           'WHERE tag = ?)')
+            args.append(value.lower())
+        # Dates are 'YYYY-MM-DD HH:MM:SS' strings: a day as upper bound
+        # must include all of its seconds.
+        for column, low, high in (('create_date', created_from, created_to),
+                                  ('update_date', updated_from, updated_to)):
+            if low is not None:
+                clauses.append('%s >= ?' % column)
+                args.append(low)
+            if high is not None:
+                clauses.append('%s <= ?' % column)
+                args.append(high if len(high) > 10 else high + ' 23:59:59')
+        if collection_id is not None:
+            clauses.append('id IN (SELECT document_id FROM section_documents '
+                           'WHERE collection_id = ?)')
+            args.append(str(collection_id))
+        if section_id is not None:
+            clauses.append('id IN (SELECT document_id FROM section_documents '
+                           'WHERE section_id = ?)')
+            args.append(str(section_id))
+        if not clauses:
+            return '', args
+        return ' WHERE ' + ' AND '.join(clauses), args
+
+    def query(self, sort='create_date_desc', offset=0, limit=None, **filters):
+        """
+        Find documents. All the filters must match.
+
+        :param list ids: only these ids
+        :param str language: the language of documents (en, de, …)
+        :param str tag: a tag the documents must have
+        :param list tags: tags the documents must all have
+        :param str created_from: created on or after this date (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)
+        :param str created_to: created on or before this date
+        :param str updated_from: updated on or after this date
+        :param str updated_to: updated on or before this date
+        :param str collection_id: in a section of this collection
+        :param str section_id: in this section
+        :param str sort: create_date_desc, create_date_asc, update_date_desc, update_date_asc, title_asc or title_desc
+        :param int offset: skip the first X documents
+        :param int limit: return at most X documents
+        :returns: the documents, as they were loaded
+        :rtype: list
+        """
+        where, args = self.where(**filters)
+        sql = 'SELECT payload FROM documents%s ORDER BY %s, id' % (
+            where, SORTS[sort])
+        if limit is not None or offset:
+            sql += ' LIMIT ? OFFSET ?'
+            args.extend([-1 if limit is None else limit, offset])
+        with self.lock:
+            rows = self.connection.execute(sql, args).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, **filters):
+        """
+        Count the documents matching the filters of :meth:`query`.
+
+        :rtype: int
+        """
+        where, args = self.where(**filters)
+        with self.lock:
+            return self.connection.execute(
+                'SELECT COUNT(*) FROM documents' + where, args).fetchone()[0]
+
+    def get(self, id):
+        """
+        Get one document by id, or None if it's not in the index.
+        """
+        documents = self.query(ids=[id])
+        return documents[0] if documents else None
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+The JSON decoders the client can use for the responses. The fastest one
+installed is used by default: orjson, then ujson, then the json module of
+the standard library. Install one with::
+
+    pip install yumpu-sdk[fast]
+
+orjson and ujson decode the raw bytes of the body, without making a text
+copy of it first; the json module decodes them to text internally.
+"""
+import json
+
+
+def _stdlib_loads(data):
+    try:
+        return json.loads(data)
+    except TypeError:
+        # json.loads only takes bytes since python 3.6.
+        return json.loads(data.decode('utf-8'))
+
+
+def _orjson():
+    import orjson
+    return orjson.loads
+
+
+def _ujson():
+    import ujson
+    return ujson.loads
+
+
+DECODERS = {
+    'orjson': _orjson,
+    'ujson': _ujson,
+    'json': lambda: _stdlib_loads,
+}
+PREFERENCE = ('orjson', 'ujson', 'json')
+
+
+def get_decoder(name=None):
+    """
+    Return a function decoding JSON from bytes.
+
+    :param str name: orjson, ujson or json; the fastest one installed if not given
+    :raises ImportError: if the requested decoder is not installed
+    """
+    if name is not None:
+        if name not in DECODERS:
+            raise ValueError('Unknown JSON decoder: %s' % name)
+        return DECODERS[name]()
+    for name in PREFERENCE:
+        try:
+            return DECODERS[name]()
+        except ImportError:
+            continue
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Light objects for the records returned by Yumpu API.
+
+They are enabled with ``Yumpu(token, models=True)``. The envelope of every
+response stays a dict, while the records in it (documents, hotspots,
+collections, sections, the user and the search results) become instances
+of the classes below. Their known fields live in ``__slots__``, so a record
+takes a fraction of the memory of a dict, and the nested parts
+(``settings``, ``image`` and the ``sections`` of a collection) are only turned into
+objects the first time they are read.
+
+A record can be read both as an object and as a dict, so the code written
+for the plain responses keeps working::
+
+    document.url == document['url'] == document.get('url')
+
+The lists of records are wrapped lazily too: a record is turned into a model
+the first time it is read from its list, so the records never read cost
+nothing. Models are not free though: building one costs more CPU than the
+dict it replaces, so reading every record of a big listing takes longer
+than with plain dicts, for about 10% less memory. Enable them for the
+attribute access, not for speed.
+"""
+
+
+class Record(dict):
+    """
+    A dict whose keys can be read as attributes too, for the nested parts
+    of records like ``settings``.
+    """
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            value = self[name]
+        except KeyError:
+            raise AttributeError(name)
+        if type(value) is dict:
+            value = self[name] = Record(value)
+        return value
+
+
+class Nested(object):
+    """
+    A field holding the raw decoded JSON until it is read for the first
+    time, when it is wrapped in ``cls`` (every item of it for a list).
+    """
+
+    def __init__(self, name, cls=Record):
+        self.name = name
+        self.slot = '_' + name
+        self.cls = cls
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if type(value) is dict:
+            value = self.cls(value)
+            setattr(obj, self.slot, value)
+        elif type(value) is list and \
+                any(type(item) is dict for item in value):
+            value = [self.cls(item) if type(item) is dict else item
+                     for item in value]
+            setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+    def __delete__(self, obj):
+        delattr(obj, self.slot)
+
+
+def slots(fields, nested=()):
+    return tuple('_' + field if field in nested else field
+                 for field in fields) + ('extra',)
+
+
+def plain(value):
+    """
+    Turn models back into dicts, recursively. Usable as the ``default`` of
+    :func:`json.dumps`.
+    """
+    if isinstance(value, Model):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    if isinstance(value, dict):
+        return dict((key, plain(item)) for key, item in value.items())
+    return value
+
+
+class Model(object):
+    """
+    The base of the records. The fields missing from the response are
+    missing from the record too: reading them as attribute raises
+    AttributeError, as key KeyError. The fields unknown to the class are
+    kept in a dict, in ``extra``.
+
+    :param dict data: the record, as decoded from the response
+    """
+    __slots__ = ()
+    fields = ()
+
+    def __init__(self, data=None, **fields):
+        self.extra = None
+        for source in (data or {}, fields):
+            for key, value in source.items():
+                self[key] = value
+
+    def __getitem__(self, key):
+        if key in self.fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self.fields:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.fields:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        elif self.extra is None:
+            raise KeyError(key)
+        else:
+            del self.extra[key]
+
+    def __getattr__(self, name):
+        # Only called when the attribute is not a set slot.
+        extra = object.__getattribute__(self, 'extra') \
+            if name != 'extra' else None
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError(name)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = [field for field in self.fields if field in self]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        """
+        The record as a plain dict, like in the responses without models.
+        """
+        return dict((key, plain(value)) for key, value in self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, Model):
+            other = other.to_dict()
+        return isinstance(other, dict) and self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+    def __repr__(self):
+        return '<%s %s>' % (type(self).__name__, self.get('id'))
+
+
+class Document(Model):
+    fields = ('id', 'create_date', 'update_date', 'url', 'short_url',
+              'image', 'language', 'title', 'description', 'tags',
+              'access_tags', 'subscriptions', 'pages', 'width', 'height',
+              'embed_code', 'settings', 'progress')
+    __slots__ = slots(fields, ('image', 'settings'))
+    image = Nested('image')
+    settings = Nested('settings')
+
+
+class Hotspot(Model):
+    fields = ('id', 'document_id', 'page', 'type', 'settings',
+              'create_date', 'update_date')
+    __slots__ = slots(fields, ('settings',))
+    settings = Nested('settings')
+
+
+class Section(Model):
+    fields = ('id', 'create_date', 'update_date', 'name', 'description',
+              'sorting', 'order', 'documents')
+    __slots__ = slots(fields)
+
+
+class Collection(Model):
+    fields = ('id', 'create_date', 'update_date', 'name', 'order',
+              'sections')
+    __slots__ = slots(fields, ('sections',))
+    sections = Nested('sections', Section)
+
+
+class User(Model):
+    fields = ('id', 'create_date', 'activate_date', 'last_login_date',
+              'username', 'email', 'gender', 'name', 'firstname', 'lastname',
+              'birth_date', 'address', 'zip_code', 'city', 'country',
+              'description', 'website', 'blog', 'language')
+    __slots__ = slots(fields)
+
+
+class SearchHit(Model):
+    fields = ('id', 'url', 'short_url', 'image', 'language', 'title',
+              'description', 'tags', 'embed_code', 'create_date', 'views',
+              'pages', 'heat_rank')
+    __slots__ = slots(fields, ('image',))
+    image = Nested('image')
+
+
+# The model of the records under every key of the responses.
+MODELS = {
+    'document': Document,
+    'documents': Document,
+    'hotspot': Hotspot,
+    'hotspots': Hotspot,
+    'collection': Collection,
+    'collections': Collection,
+    'section': Section,
+    'sections': Section,
+    'user': User,
+}
+
+
+class Records(list):
+    """
+    A list of records, turning each of them into ``cls`` the first time it
+    is read.
+    """
+    __slots__ = ('cls',)
+
+    def __init__(self, items, cls):
+        list.__init__(self, items)
+        self.cls = cls
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = list.__getitem__(self, index)
+        if type(item) is dict:
+            item = self.cls(item)
+            list.__setitem__(self, index, item)
+        return item
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __reversed__(self):
+        for index in range(len(self) - 1, -1, -1):
+            yield self[index]
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def wrap(response, search=False):
+    """
+    Turn the records of a decoded response into models, in place.
+
+    :param dict response: the decoded response
+    :param bool search: the response comes from search, its documents are :class:`SearchHit`
+    :returns: the response
+    """
+    if not isinstance(response, dict):
+        return response
+    for key, value in response.items():
+        cls = MODELS.get(key)
+        if cls is None:
+            continue
+        if search and key == 'documents':
+            cls = SearchHit
+        if type(value) is dict:
+            response[key] = cls(value)
+        elif type(value) is list:
+            response[key] = Records(value, cls)
+    return response
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+A streaming multipart/form-data encoder, so big PDFs are uploaded straight
+from the disk instead of being loaded in memory first.
+"""
+import collections
+import io
+import os
+import time
+import uuid
+
+
+CHUNK_SIZE = 64 * 1024
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+
+def to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    if not isinstance(value, text_type):
+        value = text_type(value)
+    return value.encode('utf-8')
+
+
+def source_size(f):
+    """
+    The number of bytes left to read in a seekable file object, or None if
+    it can't be known.
+    """
+    try:
+        position = f.tell()
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(position)
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+    return size - position
+
+
+class MultipartEncoder(object):
+    """
+    A file like object producing a multipart/form-data body on the fly.
+
+    Only one chunk of the uploaded file is in memory at a time, and the
+    length of the body is computed in advance, so the request is sent with
+    a ``Content-Length`` header. When the file can't be measured, like a
+    pipe, send :attr:`body` instead, which is sent in chunks. Files opened by the encoder are closed by
+    :meth:`close`; file objects given by the caller are left open.
+
+    :param dict fields: the form fields; None values are skipped
+    :param dict files: the files, as a dict of field name and a path, bytes (bytearray on python 2) or a file object
+    :param int chunk_size: how many bytes of the file to read at once
+    :param callback: called as ``callback(bytes_sent, total_bytes)`` every time a chunk is sent; ``total_bytes`` is None when the size of the file can't be known
+
+    >>> encoder = MultipartEncoder({'title': 'My catalogue'},
+    ...                            {'file': '/home/user/catalogue.pdf'})
+    >>> headers = {'Content-Type': encoder.content_type}
+    """
+
+    def __init__(self, fields, files, chunk_size=CHUNK_SIZE, callback=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary=%s' % self.boundary
+        self.chunk_size = chunk_size
+        self.callback = callback
+        self.opened = []
+        self.parts = []
+        try:
+            for name, value in sorted((fields or {}).items()):
+                if value is None:
+                    continue
+                self.parts.append(self.header(name) + b'\r\n' +
+                                  to_bytes(value) + b'\r\n')
+            for name, source in sorted((files or {}).items()):
+                filename, f = self.open(name, source)
+                self.parts.append(self.header(name, filename) +
+                                  b'Content-Type: application/pdf\r\n\r\n')
+                self.parts.append(f)
+                self.parts.append(b'\r\n')
+            self.parts.append(to_bytes('--%s--\r\n' % self.boundary))
+        except Exception:
+            self.close()
+            raise
+        self.starts = [self.tell_source(part) for part in self.parts]
+        self.length = self.compute_length()
+        self.reset()
+
+    def header(self, name, filename=None):
+        disposition = 'form-data; name="%s"' % name
+        if filename is not None:
+            disposition += '; filename="%s"' % filename
+        return to_bytes('--%s\r\nContent-Disposition: %s\r\n' % (
+            self.boundary, disposition))
+
+    def open(self, name, source):
+        # On python 2 a str is a path, pass a bytearray for raw content.
+        if isinstance(source, bytearray) or \
+                (bytes is not str and isinstance(source, bytes)):
+            return name + '.pdf', io.BytesIO(source)
+        if isinstance(source, (str, text_type)):
+            f = open(source, 'rb')
+            self.opened.append(f)
+            return os.path.basename(source), f
+        # The name of a TemporaryFile or of os.fdopen() is its descriptor.
+        filename = getattr(source, 'name', None)
+        if isinstance(filename, (str, text_type)):
+            filename = os.path.basename(filename)
+        else:
+            filename = None
+        return filename or name + '.pdf', source
+
+    def tell_source(self, part):
+        if isinstance(part, bytes):
+            return 0
+        try:
+            return part.tell()
+        except (AttributeError, IOError, OSError, ValueError):
+            return None
+
+    def compute_length(self):
+        length = 0
+        for part in self.parts:
+            if isinstance(part, bytes):
+                length += len(part)
+                continue
+            size = source_size(part)
+            if size is None:
+                return None
+            length += size
+        return length
+
+    def __len__(self):
+        if self.length is None:
+            raise TypeError('The length of the body is unknown')
+        return self.length
+
+    @property
+    def body(self):
+        """
+        What to send as the body of the request: the encoder itself when its
+        length is known, else a :class:`ChunkedBody` sent with chunked
+        transfer encoding.
+        """
+        if self.length is None:
+            return ChunkedBody(self)
+        return self
+
+    def reset(self):
+        self.index = 0
+        self.offset = 0
+        self.position = 0
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """
+        Only rewinding to the beginning is supported, so the request can be
+        sent again.
+        """
+        if offset != 0 or whence != os.SEEK_SET:
+            raise IOError('MultipartEncoder can only be rewound')
+        for part, start in zip(self.parts, self.starts):
+            if not isinstance(part, bytes):
+                if start is None:
+                    raise IOError('The uploaded file can not be rewound')
+                part.seek(start)
+        self.reset()
+        if self.callback is not None:
+            self.callback(0, self.length)
+
+    def tell(self):
+        return self.position
+
+    def read_part(self, size):
+        part = self.parts[self.index]
+        if isinstance(part, bytes):
+            data = part[self.offset:self.offset + size]
+            self.offset += len(data)
+            if self.offset >= len(part):
+                self.index += 1
+                self.offset = 0
+            return data
+        data = part.read(size)
+        if not data:
+            self.index += 1
+            self.offset = 0
+        return data
+
+    def read_bytes(self, size=-1):
+        """
+        Read like :meth:`read`, without reporting the progress, so the
+        reading can happen in another thread than the callback.
+        """
+        chunks = []
+        wanted = size if size is not None and size >= 0 else float('inf')
+        while wanted > 0 and self.index < len(self.parts):
+            data = self.read_part(int(min(wanted, self.chunk_size)))
+            chunks.append(data)
+            wanted -= len(data)
+        data = b''.join(chunks)
+        self.position += len(data)
+        return data
+
+    def report(self):
+        """
+        Call the callback with the progress of the upload.
+        """
+        if self.callback is not None:
+            self.callback(self.position, self.length)
+
+    def read(self, size=-1):
+        data = self.read_bytes(size)
+        if data:
+            self.report()
+        return data
+
+    def __iter__(self):
+        while True:
+            data = self.read(self.chunk_size)
+            if not data:
+                return
+            yield data
+
+    def close(self):
+        """
+        Close the files opened by the encoder.
+        """
+        while self.opened:
+            self.opened.pop().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ChunkedBody(object):
+    """
+    The body of an upload whose length can't be known, like a pipe. It has
+    no length, so requests sends it in chunks with a
+    ``Transfer-Encoding: chunked`` header.
+    """
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+
+    def __iter__(self):
+        return iter(self.encoder)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self.encoder.seek(offset, whence)
+
+
+class UploadStats(object):
+    """
+    Statistics about one upload, filled while the file is sent. Give it to
+    :meth:`yumpu_sdk.api.Yumpu.document_post_file` and read it during or
+    after the upload.
+
+    * ``bytes_sent`` and ``total_bytes`` - the progress of the upload
+    * ``average_throughput`` - bytes per second since the upload started
+    * ``throughput`` - bytes per second over the last ``window`` seconds
+    * ``time_to_first_byte`` - seconds between the last byte sent and the response
+    * ``elapsed`` - seconds since the upload started
+
+    :param float window: the length in seconds of the window used for ``throughput``
+    :param callback: also called as ``callback(stats)`` on every progress
+
+    >>> from yumpu_sdk.api import Yumpu
+    >>> from yumpu_sdk.multipart import UploadStats
+    >>> yumpu = Yumpu('YOUR_TOKEN_HERE')
+    >>> stats = UploadStats()
+    >>> yumpu.document_post_file(title='My catalogue',
+    ...                          filename='/home/user/catalogue.pdf',
+    ...                          upload_stats=stats)
+    >>> stats.average_throughput, stats.time_to_first_byte
+    """
+
+    def __init__(self, window=1.0, callback=None):
+        self.window = window
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        self.bytes_sent = 0
+        self.total_bytes = None
+        self.started = None
+        self.sent = None
+        self.responded = None
+        self.samples = collections.deque()
+
+    def __call__(self, bytes_sent, total_bytes):
+        now = time.time()
+        if bytes_sent == 0 or self.started is None:
+            self.reset()
+            self.started = now
+        self.bytes_sent = bytes_sent
+        self.total_bytes = total_bytes
+        self.samples.append((now, bytes_sent))
+        while len(self.samples) > 2 and \
+                now - self.samples[1][0] >= self.window:
+            self.samples.popleft()
+        if total_bytes is not None and bytes_sent >= total_bytes:
+            self.sent = now
+        if self.callback is not None:
+            self.callback(self)
+
+    def response_received(self):
+        """
+        Mark the moment the response to the upload arrived.
+        """
+        now = time.time()
+        if self.sent is None:
+            self.sent = now
+        self.responded = now
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.responded or self.sent or time.time()) - self.started
+
+    @property
+    def average_throughput(self):
+        if self.started is None:
+            return 0.0
+        duration = (self.sent or time.time()) - self.started
+        if duration <= 0:
+            return 0.0
+        return self.bytes_sent / duration
+
+    @property
+    def throughput(self):
+        if len(self.samples) < 2:
+            return self.average_throughput
+        (first_time, first_bytes), (last_time, last_bytes) = \
+            self.samples[0], self.samples[-1]
+        if last_time <= first_time:
+            return self.average_throughput
+        return (last_bytes - first_bytes) / (last_time - first_time)
+
+    @property
+    def progress(self):
+        """
+        The part of the file already sent, between 0 and 1, or None if the
+        size of the file is unknown.
+        """
+        if not self.total_bytes:
+            return None
+        return float(self.bytes_sent) / self.total_bytes
+
+    @property
+    def time_to_first_byte(self):
+        if self.responded is None or self.sent is None:
+            return None
+        return self.responded - self.sent
+
+    def as_dict(self):
+        return {
+            'bytes_sent': self.bytes_sent,
+            'total_bytes': self.total_bytes,
+            'elapsed': self.elapsed,
+            'throughput': self.throughput,
+            'average_throughput': self.average_throughput,
+            'time_to_first_byte': self.time_to_first_byte,
+        }
+
+    def __repr__(self):
+        return '<UploadStats %s/%s bytes, %.0f B/s>' % (
+            self.bytes_sent, self.total_bytes, self.average_throughput)
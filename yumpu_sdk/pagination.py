@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for walking the paginated listings of Yumpu API page by page.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from .exceptions import YumpuError
+
+
+MAX_LIMIT = 100
+
+
+def page_records(response, key):
+    """
+    Return the records of one page of a listing.
+
+    :param dict response: the decoded response of Yumpu API
+    :param str key: the name of the list in the response (documents, collections, hotspots...)
+    :raises YumpuError: if the response has an error state
+    :rtype: list
+    """
+    if response.get('state', 'success') != 'success':
+        raise YumpuError(response)
+    records = response.get(key) or []
+    if isinstance(records, dict):
+        records = [records]
+    return records
+
+
+def is_last_page(response, records, offset, limit):
+    """
+    Tell if there is nothing more to fetch after the given page.
+    """
+    if len(records) < limit:
+        return True
+    try:
+        total = int(response['total'])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return offset + len(records) >= total
+
+
+def iter_pages(fetch, key, offset=0, limit=MAX_LIMIT, prefetch=False):
+    """
+    Yield the records of a paginated listing one by one, requesting the
+    pages lazily. Only the current page (and the next one, when prefetching)
+    is kept in memory.
+
+    :param fetch: a callable taking ``offset`` and ``limit`` and returning the decoded response
+    :param str key: the name of the list in the response
+    :param int offset: the position of the first record to yield
+    :param int limit: how many records to request per page (max. 100)
+    :param bool prefetch: request the next page in a background thread while the current one is consumed
+    """
+    limit = min(limit, MAX_LIMIT)
+    if prefetch:
+        return _iter_prefetched(fetch, key, offset, limit)
+    return _iter_serial(fetch, key, offset, limit)
+
+
+def _iter_serial(fetch, key, offset, limit):
+    while True:
+        response = fetch(offset, limit)
+        records = page_records(response, key)
+        for record in records:
+            yield record
+        if is_last_page(response, records, offset, limit):
+            return
+        offset += len(records)
+
+
+def _iter_prefetched(fetch, key, offset, limit):
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        future = executor.submit(fetch, offset, limit)
+        while future is not None:
+            response = future.result()
+            records = page_records(response, key)
+            future = None
+            if not is_last_page(response, records, offset, limit):
+                offset += len(records)
+                future = executor.submit(fetch, offset, limit)
+            for record in records:
+                yield record
+    finally:
+        executor.shutdown(wait=False)
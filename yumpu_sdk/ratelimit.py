@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Client side rate limiting, so the requests are paced to stay inside the
+limits of your Yumpu account (http://developers.yumpu.com/api/limits/)
+instead of hitting them and getting error responses.
+"""
+import threading
+import time
+
+
+UPLOAD = 'upload'
+READ = 'read'
+WRITE = 'write'
+SEARCH = 'search'
+
+UPLOAD_ENTRY_POINTS = ('/document/file.json', '/document/url.json')
+SEARCH_ENTRY_POINTS = ('/search.json',)
+
+
+def endpoint_family(method, url):
+    """
+    Tell to which family of endpoints a request belongs.
+
+    :param str method: the HTTP verb
+    :param str url: the url of request
+    :returns: one of ``upload``, ``search``, ``read`` or ``write``
+    :rtype: str
+    """
+    path = url.split('?', 1)[0]
+    if method.upper() == 'POST' and path.endswith(UPLOAD_ENTRY_POINTS):
+        return UPLOAD
+    if path.endswith(SEARCH_ENTRY_POINTS):
+        return SEARCH
+    if method.upper() == 'GET':
+        return READ
+    return WRITE
+
+
+class TokenBucket(object):
+    """
+    A thread safe token bucket. It holds at most ``capacity`` tokens and
+    gets ``rate`` new tokens per second. Every request takes one token;
+    when the bucket is empty the request waits for its turn, in the order
+    of arrival.
+
+    :param float rate: how many tokens are added per second
+    :param int capacity: the size of bursts allowed
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def per_period(cls, requests, seconds, capacity=None):
+        """
+        Make a bucket allowing ``requests`` requests every ``seconds``
+        seconds.
+
+        >>> uploads = TokenBucket.per_period(1, 15 * 60)
+        """
+        if capacity is None:
+            capacity = requests
+        return cls(float(requests) / seconds, capacity)
+
+    def reserve(self, tokens=1):
+        """
+        Take tokens from the bucket, going in debt if there are not enough
+        of them.
+
+        :returns: how many seconds the caller must wait before sending the request
+        :rtype: float
+        """
+        with self.lock:
+            now = time.time()
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens from the bucket, sleeping until they are available.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class RateLimiter(object):
+    """
+    Paces the requests of a client with one :class:`TokenBucket` per family
+    of endpoints: ``upload`` (document_post_file and document_post_url),
+    ``search``, ``read`` (other GET requests) and ``write`` (other POST, PUT
+    and DELETE requests). Families without a bucket are not limited.
+
+    You can plug your own scheduler in the client, it only needs the
+    ``reserve(method, url)`` method returning the delay in seconds.
+
+    >>> from yumpu_sdk.api import Yumpu
+    >>> from yumpu_sdk.ratelimit import RateLimiter, TokenBucket
+    >>> limiter = RateLimiter(
+    ...     upload=TokenBucket.per_period(1, 15 * 60),
+    ...     read=TokenBucket(rate=10, capacity=20),
+    ... )
+    >>> yumpu = Yumpu('YOUR_TOKEN_HERE', rate_limiter=limiter)
+    """
+
+    def __init__(self, upload=None, read=None, write=None, search=None):
+        self.buckets = {
+            UPLOAD: upload,
+            READ: read,
+            WRITE: write,
+            SEARCH: search,
+        }
+
+    @classmethod
+    def free_account(cls):
+        """
+        The limits of a free Yumpu account: only one PDF upload every 15
+        minutes.
+        """
+        return cls(upload=TokenBucket.per_period(1, 15 * 60))
+
+    def reserve(self, method, url):
+        """
+        Take a token for the given request.
+
+        :returns: how many seconds to wait before sending the request
+        :rtype: float
+        """
+        bucket = self.buckets.get(endpoint_family(method, url))
+        if bucket is None:
+            return 0.0
+        return bucket.reserve()
+
+    def acquire(self, method, url):
+        """
+        Take a token for the given request, sleeping until it's available.
+        """
+        delay = self.reserve(method, url)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Retrying of failed requests with exponential backoff.
+"""
+import email.utils
+import random
+import threading
+import time
+
+
+IDEMPOTENT_METHODS = ('GET', 'PUT', 'DELETE', 'HEAD', 'OPTIONS')
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryPolicy(object):
+    """
+    Decides which requests are sent again and how long to wait before.
+
+    By default only the idempotent verbs are retried, so an upload or the
+    creation of a collection is never sent twice. The waiting time grows
+    exponentially with every attempt (``backoff_factor * 2 ** attempt``,
+    capped by ``max_backoff``) and with ``jitter`` a random part of it is
+    used, so many clients don't retry all at the same moment. A
+    ``Retry-After`` header sent by the server is honored.
+
+    :param int total: how many times a request may be retried (0 disables retrying)
+    :param float backoff_factor: the base of the waiting time, in seconds
+    :param float max_backoff: the longest time to wait between two attempts
+    :param bool jitter: wait a random time between 0 and the computed backoff
+    :param tuple statuses: the HTTP statuses that are retried
+    :param tuple methods: the HTTP verbs that are retried
+    :param bool respect_retry_after: wait as long as the ``Retry-After`` header asks
+    :param float max_retry_after: the longest ``Retry-After`` to honor, longer ones are not retried
+
+    >>> from yumpu_sdk.api import Yumpu
+    >>> from yumpu_sdk.retry import RetryPolicy
+    >>> yumpu = Yumpu('YOUR_TOKEN_HERE', timeout=10,
+    ...               retry=RetryPolicy(total=5, backoff_factor=1))
+    """
+
+    def __init__(self, total=3, backoff_factor=0.5, max_backoff=30,
+                 jitter=True, statuses=RETRY_STATUSES,
+                 methods=IDEMPOTENT_METHODS, respect_retry_after=True,
+                 max_retry_after=120):
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(m.upper() for m in methods)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+
+    def can_retry(self, method, attempt, never_sent=False):
+        """
+        Tell if a request sent ``attempt + 1`` times may be sent again.
+
+        :param bool never_sent: the request couldn't even connect, so it was never received and is safe to send again whatever its verb is
+        """
+        return attempt < self.total and (never_sent or
+                                         method.upper() in self.methods)
+
+    def is_retryable_status(self, status):
+        return status in self.statuses
+
+    def backoff(self, attempt):
+        """
+        The time to wait after the given (zero based) failed attempt.
+        """
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def retry_after(self, headers):
+        """
+        Read the ``Retry-After`` header, given in seconds or as an HTTP date.
+
+        :returns: the seconds to wait, or None if there is no usable header
+        """
+        value = headers.get('Retry-After') if headers else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        parsed = email.utils.parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(0.0, email.utils.mktime_tz(parsed) - time.time())
+
+    def delay(self, attempt, headers=None):
+        """
+        The time to wait before the next attempt, or None if the server
+        asks to wait longer than ``max_retry_after``.
+        """
+        if self.respect_retry_after:
+            retry_after = self.retry_after(headers)
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    return None
+                return retry_after
+        return self.backoff(attempt)
+
+
+class RetryStats(object):
+    """
+    Thread safe counters about the retrying done by a client, useful for
+    tuning the :class:`RetryPolicy`.
+
+    * ``requests`` - the calls made by the client
+    * ``attempts`` - the requests actually sent, retries included
+    * ``retries`` - how many times a request was sent again
+    * ``exhausted`` - how many calls failed after all the retries
+    * ``sleep_time`` - the seconds spent waiting between attempts
+    * ``total_time`` - the seconds spent in requests, waiting included
+    """
+    FIELDS = ('requests', 'attempts', 'retries', 'exhausted', 'sleep_time',
+              'total_time')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.attempts = 0
+            self.retries = 0
+            self.exhausted = 0
+            self.sleep_time = 0.0
+            self.total_time = 0.0
+
+    def record(self, attempts, sleep_time, total_time, exhausted=False):
+        """
+        Account one call to the client.
+        """
+        with self.lock:
+            self.requests += 1
+            self.attempts += attempts
+            self.retries += attempts - 1
+            self.sleep_time += sleep_time
+            self.total_time += total_time
+            if exhausted:
+                self.exhausted += 1
+
+    def as_dict(self):
+        with self.lock:
+            return dict((field, getattr(self, field)) for field in self.FIELDS)
+
+    def __repr__(self):
+        return '<RetryStats %s>' % ', '.join(
+            '%s=%s' % item for item in sorted(self.as_dict().items())
+        )
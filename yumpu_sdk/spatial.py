@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+An in-memory index of the geometry of hotspots, to validate and deduplicate
+big sets of hotspots before sending them.
+
+The hotspots of every page are put in the cells of a grid, so a query only
+looks at the hotspots near the queried area instead of all the hotspots of
+the page::
+
+    from yumpu_sdk.hotspots import read_hotspots
+    from yumpu_sdk.spatial import HotspotIndex
+
+    index = HotspotIndex(read_hotspots('hotspots.csv'))
+    for first, second in index.overlaps():
+        print('%s overlaps %s' % (first['name'], second['name']))
+
+The hotspots can be rows of :mod:`yumpu_sdk.hotspots` or hotspots of Yumpu
+API, with their ``settings``. The ones without a valid geometry are kept
+in ``invalid``.
+"""
+from .hotspots import flatten_record, normalize
+
+
+CELL_SIZE = 100
+
+
+def box(hotspot):
+    """
+    The ``(x1, y1, x2, y2)`` box of a hotspot row, or None if its geometry
+    is missing or not a number.
+    """
+    try:
+        x, y, w, h = [float(hotspot[name]) for name in ('x', 'y', 'w', 'h')]
+    except (KeyError, TypeError, ValueError):
+        return None
+    if w < 0 or h < 0:
+        return None
+    return x, y, x + w, y + h
+
+
+def overlap(a, b):
+    """
+    Whether two boxes overlap; boxes only touching at an edge don't.
+    """
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def contains(a, b):
+    """
+    Whether the box a contains the box b.
+    """
+    return a[0] <= b[0] and a[1] <= b[1] and b[2] <= a[2] and b[3] <= a[3]
+
+
+class HotspotIndex(object):
+    """
+    The hotspots of documents, by page and position.
+
+    :param hotspots: an iterable of hotspot rows or of hotspots of Yumpu API
+    :param float cell_size: the side of the cells of the grid, in the unit of the coordinates; about the size of a typical hotspot is best
+    """
+
+    def __init__(self, hotspots=(), cell_size=CELL_SIZE):
+        self.cell_size = float(cell_size)
+        self.pages = {}
+        self.invalid = []
+        self.count = 0
+        self.extend(hotspots)
+
+    def __len__(self):
+        return self.count
+
+    def cells(self, area):
+        size = self.cell_size
+        for i in range(int(area[0] // size), int(area[2] // size) + 1):
+            for j in range(int(area[1] // size), int(area[3] // size) + 1):
+                yield i, j
+
+    def add(self, hotspot):
+        """
+        Index a hotspot.
+
+        :returns: whether it has a valid geometry and was indexed
+        """
+        row = flatten_record(hotspot)
+        area = box(row)
+        if area is None:
+            self.invalid.append(hotspot)
+            return False
+        key = normalize('page', row.get('page'))
+        page = self.pages.setdefault(key, {'entries': [], 'grid': {}})
+        position = len(page['entries'])
+        page['entries'].append((area, hotspot))
+        for cell in self.cells(area):
+            page['grid'].setdefault(cell, []).append(position)
+        self.count += 1
+        return True
+
+    def extend(self, hotspots):
+        for hotspot in hotspots:
+            self.add(hotspot)
+
+    def candidates(self, page, area):
+        """
+        The entries of a page sharing a cell with an area, once each, in
+        the order they were added.
+        """
+        page = self.pages.get(normalize('page', page))
+        if page is None:
+            return []
+        positions = set()
+        for cell in self.cells(area):
+            positions.update(page['grid'].get(cell, ()))
+        return [page['entries'][position] for position in sorted(positions)]
+
+    def overlapping(self, page, x, y, w, h):
+        """
+        The hotspots of a page overlapping an area.
+        """
+        area = (x, y, x + w, y + h)
+        return [hotspot for other, hotspot in self.candidates(page, area)
+                if overlap(area, other)]
+
+    def inside(self, page, x, y, w, h):
+        """
+        The hotspots of a page fully inside an area.
+        """
+        area = (x, y, x + w, y + h)
+        return [hotspot for other, hotspot in self.candidates(page, area)
+                if contains(area, other)]
+
+    def containing(self, page, x, y, w, h):
+        """
+        The hotspots of a page fully containing an area.
+        """
+        area = (x, y, x + w, y + h)
+        return [hotspot for other, hotspot in self.candidates(page, area)
+                if contains(other, area)]
+
+    def at(self, page, x, y):
+        """
+        The hotspots of a page under a point, as a click there would hit
+        them.
+        """
+        return self.containing(page, x, y, 0, 0)
+
+    def overlaps(self):
+        """
+        All the pairs of overlapping hotspots of the same page.
+
+        :returns: a generator of ``(hotspot, hotspot)`` tuples, every pair once
+        """
+        for page in self.pages.values():
+            entries = page['entries']
+            seen = set()
+            for positions in page['grid'].values():
+                for n, first in enumerate(positions):
+                    for second in positions[n + 1:]:
+                        if (first, second) in seen:
+                            continue
+                        seen.add((first, second))
+                        if overlap(entries[first][0], entries[second][0]):
+                            yield entries[first][1], entries[second][1]
+
+    def duplicates(self):
+        """
+        The groups of hotspots of the same page with the same geometry.
+
+        :returns: a list of lists of at least two hotspots
+        """
+        groups = []
+        for page in self.pages.values():
+            by_area = {}
+            for area, hotspot in page['entries']:
+                by_area.setdefault(area, []).append(hotspot)
+            groups.extend(group for group in by_area.values()
+                          if len(group) > 1)
+        return groups
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Keeping a local mirror of a Yumpu account up to date, requesting only what
+changed since the last synchronization.
+"""
+import json
+import os
+import time
+
+from .batch import DEFAULT_CONCURRENCY, run_many
+from .cache import write_json
+from .models import plain
+from .pagination import MAX_LIMIT, is_last_page, page_records
+
+
+DOCUMENT_FIELDS = [
+    'id', 'create_date', 'update_date', 'url', 'short_url', 'image_small',
+    'image_medium', 'image_big', 'language', 'title', 'description', 'tags',
+    'embed_code', 'settings'
+]
+COLLECTION_FIELDS = ['id', 'create_date', 'update_date', 'name', 'order',
+                     'sections']
+SECTION_FIELDS = ['id', 'create_date', 'update_date', 'name', 'description',
+                  'sorting', 'order', 'documents']
+NO_DATE = '0000-00-00 00:00:00'
+
+
+def change_stamp(record):
+    """
+    The moment a record changed for the last time, as a ``YYYY-MM-DD
+    HH:MM:SS`` string, which sorts like the dates it represents.
+    """
+    stamps = [record.get('update_date') or NO_DATE,
+              record.get('create_date') or NO_DATE]
+    return max(stamps)
+
+
+class MemoryStore(object):
+    """
+    Keeps the mirrored records in memory. ``documents``, ``collections`` and
+    ``sections`` are dicts by id, ``hotspots`` is a dict of lists by
+    document id, ``scanned`` holds the ids of the documents listed by a
+    running full scan and ``state`` holds the checkpoints of the
+    synchronization.
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.collections = {}
+        self.sections = {}
+        self.hotspots = {}
+        self.scanned = {}
+        self.state = {}
+
+    def checkpoint(self, changes):
+        """
+        Make the changes of a running synchronization durable.
+
+        :param dict changes: the changed values by id, per attribute of the store; they are already applied
+        """
+        pass
+
+    def save(self):
+        pass
+
+
+class JSONStore(MemoryStore):
+    """
+    Keeps the mirrored records in JSON files of a directory. The files are
+    written atomically on every :meth:`save`, at the end of a
+    synchronization. The checkpoints in between only append their changes
+    to a journal, so a scan writes every record once, and an interrupted
+    synchronization resumes from its last checkpoint.
+
+    :param str directory: where to keep the files; it's created if missing
+    """
+    KINDS = ('documents', 'collections', 'sections', 'hotspots', 'scanned',
+             'state')
+
+    def __init__(self, directory):
+        super(JSONStore, self).__init__()
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        for kind in self.KINDS:
+            path = self.path(kind)
+            if os.path.exists(path):
+                with open(path) as f:
+                    setattr(self, kind, json.load(f))
+        self.replay()
+
+    def path(self, kind):
+        return os.path.join(self.directory, kind + '.json')
+
+    @property
+    def journal(self):
+        return os.path.join(self.directory, 'journal.jsonl')
+
+    def replay(self):
+        """
+        Apply the checkpoints written since the last :meth:`save`.
+        """
+        if not os.path.exists(self.journal):
+            return
+        with open(self.journal) as f:
+            for line in f:
+                try:
+                    changes = json.loads(line)
+                except ValueError:
+                    # The last line of an interrupted checkpoint.
+                    break
+                for kind, values in changes.items():
+                    getattr(self, kind).update(values)
+
+    def checkpoint(self, changes):
+        with open(self.journal, 'a') as f:
+            f.write(json.dumps(changes, default=plain) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def save(self):
+        for kind in self.KINDS:
+            write_json(self.path(kind), getattr(self, kind))
+        if os.path.exists(self.journal):
+            os.remove(self.journal)
+
+
+class Mirror(object):
+    """
+    Synchronizes the documents, collections, sections and hotspots of an
+    account into a store.
+
+    Documents are listed newest first with all their fields, so a page of
+    the listing is at the same time the check and the download of 100
+    documents. An incremental run stops at the first page where nothing
+    changed since the previous checkpoint, so refreshing an account costs
+    one or two requests plus one page per 100 changed documents. The
+    position of a running scan and the records it changed are checkpointed
+    after every page, so an interrupted run goes on from there.
+
+    Changes to old documents which are not listed first and deleted
+    documents are only seen by a full scan (``full=True``); schedule one
+    from time to time.
+
+    The hotspots and the sections which couldn't be fetched are counted in
+    ``errors`` and fetched again on the next run; until then the mirror
+    keeps their previous version.
+
+    :param yumpu: a :class:`yumpu_sdk.api.Yumpu` client
+    :param store: a :class:`MemoryStore` or :class:`JSONStore`
+    :param bool hotspots: mirror the hotspots of the changed documents too
+    :param int concurrency: how many sections or hotspot listings to fetch at the same time
+
+    >>> from yumpu_sdk.api import Yumpu
+    >>> from yumpu_sdk.sync import JSONStore, Mirror
+    >>> mirror = Mirror(Yumpu('YOUR_TOKEN_HERE'), JSONStore('/var/lib/yumpu'))
+    >>> mirror.sync()
+    {'documents': {'new': 3, 'updated': 1, 'deleted': 0, 'pages': 1}, ...}
+    """
+
+    def __init__(self, yumpu, store, hotspots=False,
+                 concurrency=DEFAULT_CONCURRENCY):
+        self.yumpu = yumpu
+        self.store = store
+        self.hotspots = hotspots
+        self.concurrency = concurrency
+
+    def sync(self, full=False):
+        """
+        Synchronize everything.
+
+        :param bool full: scan all the documents, to notice old changes and deletions
+        :returns: counts of new, updated and deleted records
+        :rtype: dict
+        """
+        return {
+            'documents': self.sync_documents(full),
+            'collections': self.sync_collections(),
+        }
+
+    def sync_documents(self, full=False):
+        """
+        Synchronize the documents (and their hotspots, if enabled).
+
+        :param bool full: scan all the documents, to notice old changes and deletions
+        :returns: counts of new, updated and deleted documents, of the pages requested and of the documents whose hotspots couldn't be fetched
+        :rtype: dict
+        """
+        documents = self.store.documents
+        scanned = self.store.scanned
+        state = self.store.state.setdefault('documents', {})
+        checkpoint = state.get('checkpoint', NO_DATE)
+        scan = state.get('scan')
+        if scan is None or scan.get('full') != full:
+            scan = {'full': full, 'offset': 0, 'high_water': checkpoint,
+                    'started': time.strftime('%Y-%m-%d %H:%M:%S')}
+            state['scan'] = scan
+            scanned.clear()
+        counts = {'new': 0, 'updated': 0, 'deleted': 0, 'pages': 0,
+                  'errors': 0}
+        while True:
+            offset = scan['offset']
+            response = self.yumpu.documents_get(offset, MAX_LIMIT, 'desc',
+                                                DOCUMENT_FIELDS)
+            records = page_records(response, 'documents')
+            counts['pages'] += 1
+            changed = []
+            for record in records:
+                id = str(record['id'])
+                stamp = change_stamp(record)
+                stored = documents.get(id)
+                if stored is None or change_stamp(stored) != stamp or \
+                        stored != record:
+                    counts['updated' if stored is not None else 'new'] += 1
+                    documents[id] = record
+                    changed.append(id)
+                if stamp > scan['high_water']:
+                    scan['high_water'] = stamp
+                if full:
+                    scanned[id] = True
+            hotspots = []
+            if self.hotspots and changed:
+                failed = self.sync_hotspots(changed)
+                state['hotspots_failed'] = [
+                    id for id in state.get('hotspots_failed', [])
+                    if id not in changed] + failed
+                hotspots = [id for id in changed if id not in failed]
+            last = is_last_page(response, records, offset, MAX_LIMIT)
+            if not full and not changed and all(
+                    change_stamp(r) <= checkpoint for r in records):
+                last = True
+            scan['offset'] = offset + len(records)
+            if last:
+                break
+            self.store.checkpoint({
+                'documents': dict((id, documents[id]) for id in changed),
+                'hotspots': dict((id, self.store.hotspots[id])
+                                 for id in hotspots),
+                'scanned': dict((str(r['id']), True) for r in records)
+                if full else {},
+                'state': {'documents': state},
+            })
+        if full:
+            for id in list(documents):
+                if id not in scanned:
+                    del documents[id]
+                    self.store.hotspots.pop(id, None)
+                    counts['deleted'] += 1
+        if self.hotspots and state.get('hotspots_failed'):
+            # The checkpoint moves on, so the documents whose hotspots
+            # failed are remembered and tried again until they succeed.
+            retry = [id for id in state['hotspots_failed'] if id in documents]
+            state['hotspots_failed'] = self.sync_hotspots(retry)
+            counts['errors'] = len(state['hotspots_failed'])
+        state['checkpoint'] = scan['high_water']
+        state['last_sync'] = scan['started']
+        del state['scan']
+        scanned.clear()
+        self.store.save()
+        return counts
+
+    def sync_hotspots(self, document_ids):
+        """
+        Fetch again all the hotspots of the given documents. The stored
+        hotspots of a document are kept when fetching them fails.
+
+        :returns: the ids of the documents whose hotspots couldn't be fetched
+        :rtype: list
+        """
+        def fetch(id):
+            return {
+                'state': 'success',
+                'hotspots': list(self.yumpu.iter_hotspots(id)),
+            }
+        failed = []
+        for result in run_many(fetch, document_ids, self.concurrency):
+            if result.ok:
+                self.store.hotspots[result.id] = result.response['hotspots']
+            else:
+                failed.append(result.id)
+        return failed
+
+    def sync_collections(self):
+        """
+        Synchronize all the collections, and the sections of the collections
+        changed since the last synchronization.
+
+        :returns: counts of new, updated and deleted collections, of the sections fetched and of the ones which couldn't be
+        :rtype: dict
+        """
+        collections = self.store.collections
+        sections = self.store.sections
+        counts = {'new': 0, 'updated': 0, 'deleted': 0, 'sections': 0,
+                  'errors': 0}
+        seen = set()
+        changed = []
+        previous = {}
+        for record in self.yumpu.iter_collections(COLLECTION_FIELDS):
+            id = str(record['id'])
+            seen.add(id)
+            stored = collections.get(id)
+            if stored is None or stored != record:
+                counts['updated' if stored is not None else 'new'] += 1
+                collections[id] = record
+                changed.append(id)
+                previous[id] = stored
+        for id in list(collections):
+            if id not in seen:
+                del collections[id]
+                counts['deleted'] += 1
+        parents = {}
+        for id in changed:
+            for section in collections[id].get('sections') or []:
+                parents[str(section['id'])] = id
+        # The sections of the changed collections are only replaced once
+        # fetched, so a failed request doesn't remove them from the mirror.
+        for id, section in list(sections.items()):
+            if section.get('collection_id') not in collections or \
+                    (section.get('collection_id') in previous and
+                     id not in parents):
+                del sections[id]
+        failed = set()
+        for result in self.yumpu.section_get_many(
+                list(parents), SECTION_FIELDS, self.concurrency):
+            if result.ok:
+                for section in page_records(result.response, 'section'):
+                    section['collection_id'] = parents[result.id]
+                    sections[str(section['id'])] = section
+                    counts['sections'] += 1
+            else:
+                failed.add(parents[result.id])
+                counts['errors'] += 1
+        # The collections keep their previous version until all their
+        # sections are fetched, so the next run sees them changed again.
+        for id in failed:
+            if previous[id] is None:
+                del collections[id]
+            else:
+                collections[id] = previous[id]
+        self.store.state['collections'] = {
+            'last_sync': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        self.store.save()
+        return counts
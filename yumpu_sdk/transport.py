@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+The transports sending the requests of the client. The default one sends
+them with requests; the others record the exchanges in a cassette and
+replay them, to run code using the client offline, reproducibly and at
+memory speed::
+
+    from yumpu_sdk.transport import RecordingTransport, ReplayTransport
+
+    with Yumpu(token, transport=RecordingTransport('run.jsonl.gz')) as yumpu:
+        pipeline(yumpu)
+
+    with Yumpu(token, transport=ReplayTransport('run.jsonl.gz')) as yumpu:
+        pipeline(yumpu)
+
+A cassette is a JSON lines file, gzipped if its name ends with ``.gz``,
+with one exchange per line. Only the body and a few headers of the
+responses are kept; the token is never written.
+"""
+import base64
+import collections
+import gzip
+import hashlib
+import io
+import json
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .exceptions import CassetteError
+
+
+# The headers of the responses kept in cassettes.
+HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Retry-After')
+
+
+def open_cassette(path, mode):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, mode + 'b'), 'utf-8')
+    return io.open(path, mode, encoding='utf-8')
+
+
+def request_key(method, url, params=None, data=None, **kwargs):
+    """
+    The key matching a request to its recorded response: the verb, the url
+    with the params sorted and a digest of the form fields. Streamed bodies
+    (uploads) are not part of the key, only their url is.
+    """
+    prepared = requests.Request(method.upper(), url, params=params).prepare()
+    scheme, _, rest = prepared.url.partition('://')
+    path, _, query = rest.partition('?')
+    url = '%s://%s' % (scheme, path)
+    if query:
+        url += '?' + '&'.join(sorted(query.split('&')))
+    digest = None
+    if isinstance(data, dict):
+        fields = sorted((str(k), str(v)) for k, v in data.items()
+                        if v is not None)
+        digest = hashlib.sha1(
+            json.dumps(fields).encode('utf-8')).hexdigest()[:16]
+    return '%s %s %s' % (method.upper(), url, digest or '-')
+
+
+class RequestsTransport(object):
+    """
+    Sends the requests through the pooled requests session of the client.
+    """
+
+    def send(self, session, method, url, **kwargs):
+        """
+        :param requests.Session session: the session of the client
+        :param str method: the HTTP verb
+        :param str url: the absolute url
+        :param kwargs: the arguments of :meth:`requests.Session.request`
+        :rtype: requests.Response
+        """
+        return session.request(method, url, **kwargs)
+
+
+class RecordingTransport(object):
+    """
+    Sends the requests with another transport and appends every exchange
+    to a cassette.
+
+    :param str path: the cassette; it's created or appended to
+    :param transport: the transport really sending the requests, a :class:`RequestsTransport` by default
+    """
+
+    def __init__(self, path, transport=None):
+        self.path = path
+        self.transport = transport or RequestsTransport()
+        self.file = open_cassette(path, 'a')
+        self.lock = threading.Lock()
+        self.recorded = 0
+
+    def send(self, session, method, url, **kwargs):
+        started = time.time()
+        r = self.transport.send(session, method, url, **kwargs)
+        elapsed = time.time() - started
+        content = r.content or b''
+        try:
+            body, encoding = content.decode('utf-8'), None
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode('ascii'), 'b64'
+        exchange = {
+            'k': request_key(method, url, **kwargs),
+            's': r.status_code,
+            'h': dict((name, r.headers[name]) for name in HEADERS
+                      if name in r.headers),
+            'b': body,
+            't': round(elapsed, 4),
+        }
+        if encoding:
+            exchange['e'] = encoding
+        line = json.dumps(exchange, separators=(',', ':'))
+        with self.lock:
+            self.file.write(line + u'\n')
+            self.file.flush()
+            self.recorded += 1
+        return r
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class ReplayTransport(object):
+    """
+    Serves the responses recorded in a cassette, without any network.
+    The responses recorded several times for the same request are served
+    in their order, the last one again once they are exhausted.
+
+    :param str path: the cassette
+    :param bool latency: wait as long as the recorded request took, to reproduce the timing of the recording
+    :param float speed: divides the waits when ``latency`` is set (2 replays twice as fast)
+    :raises CassetteError: from :meth:`send`, for a request not in the cassette
+    """
+
+    def __init__(self, path, latency=False, speed=1.0):
+        self.latency = latency
+        self.speed = speed
+        self.exchanges = collections.defaultdict(collections.deque)
+        self.lock = threading.Lock()
+        with open_cassette(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    exchange = json.loads(line)
+                    self.exchanges[exchange['k']].append(exchange)
+
+    def send(self, session, method, url, **kwargs):
+        key = request_key(method, url, **kwargs)
+        with self.lock:
+            exchanges = self.exchanges.get(key)
+            if not exchanges:
+                raise CassetteError('No recorded response for %s' % key)
+            exchange = exchanges[0]
+            if len(exchanges) > 1:
+                exchanges.popleft()
+        if self.latency and exchange.get('t'):
+            time.sleep(exchange['t'] / self.speed)
+        return self.response(exchange, method, url, kwargs)
+
+    def response(self, exchange, method, url, kwargs):
+        r = requests.Response()
+        r.status_code = exchange['s']
+        r.headers = CaseInsensitiveDict(exchange.get('h') or {})
+        body = exchange.get('b') or ''
+        if exchange.get('e') == 'b64':
+            r._content = base64.b64decode(body)
+        else:
+            r._content = body.encode('utf-8')
+        # A consumed body with a closeable stream, like a real response,
+        # so the client can close the responses it retries.
+        r._content_consumed = True
+        r.raw = io.BytesIO(r._content)
+        r.encoding = 'utf-8'
+        r.request = requests.Request(
+            method, url, params=kwargs.get('params'),
+            data=kwargs.get('data') if isinstance(kwargs.get('data'), dict)
+            else None).prepare()
+        r.url = r.request.url
+        return r
+
+    def close(self):
+        pass
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Waiting for the conversion of many uploaded documents at once.
+"""
+import heapq
+import time
+
+from .batch import DEFAULT_CONCURRENCY, run_many
+from .exceptions import YumpuError
+
+
+def conversion_finished(response):
+    """
+    Tell if the response of :meth:`yumpu_sdk.api.Yumpu.progess_get` shows a
+    finished conversion. An error response is finished too, there is no
+    point in polling it again.
+
+    :param dict response: the response of progess_get
+    :rtype: bool
+    """
+    if response.get('state', 'success') != 'success':
+        return True
+    document = response.get('document')
+    if isinstance(document, list):
+        document = document[0] if document else None
+    if not document or not document.get('id'):
+        return False
+    try:
+        return float(document.get('progress', 100)) >= 100
+    except (TypeError, ValueError):
+        return True
+
+
+class ConversionWaiter(object):
+    """
+    Polls the progress of many conversions from one loop. Every progress id
+    is polled again after a time proportional to how long it is already
+    waited for (``growth`` of the elapsed time, kept between
+    ``min_interval`` and ``max_interval``), so a long conversion costs
+    a number of requests growing only with the logarithm of its duration.
+    The ids due at the same moment are polled in parallel.
+
+    :param yumpu: a :class:`yumpu_sdk.api.Yumpu` client
+    :param float min_interval: the shortest time between two polls of the same id
+    :param float max_interval: the longest time between two polls of the same id
+    :param float growth: the part of the elapsed time to wait before the next poll
+    :param int concurrency: how many ids to poll at the same time
+    :param is_finished: a callable telling if a progess_get response is final
+    """
+
+    def __init__(self, yumpu, min_interval=2.0, max_interval=60.0,
+                 growth=0.25, concurrency=DEFAULT_CONCURRENCY,
+                 is_finished=conversion_finished):
+        self.yumpu = yumpu
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.growth = growth
+        self.concurrency = concurrency
+        self.is_finished = is_finished
+        self.requests = 0
+
+    def interval(self, elapsed):
+        return max(self.min_interval,
+                   min(self.max_interval, elapsed * self.growth))
+
+    def wait(self, progress_ids, timeout=None, first_poll=None):
+        """
+        Yield ``(progress_id, response)`` for every conversion as soon as
+        it finishes, in the order they finish. The ids not yielded when the
+        generator stops didn't finish before ``timeout``.
+
+        :param list progress_ids: the progress ids returned by the uploads
+        :param float timeout: how many seconds to wait at most (None to wait forever)
+        :param float first_poll: when to poll for the first time, ``min_interval`` by default
+        """
+        started = time.time()
+        deadline = None if timeout is None else started + timeout
+        if first_poll is None:
+            first_poll = self.min_interval
+        queue = [(started + first_poll, id) for id in set(progress_ids)]
+        heapq.heapify(queue)
+        while queue:
+            wake = queue[0][0]
+            if deadline is not None and wake > deadline:
+                return
+            now = time.time()
+            if wake > now:
+                time.sleep(wake - now)
+                now = time.time()
+            due = []
+            while queue and queue[0][0] <= now:
+                due.append(heapq.heappop(queue)[1])
+            self.requests += len(due)
+            results = run_many(self.yumpu.progess_get, due, self.concurrency)
+            now = time.time()
+            for result in results:
+                if result.ok and self.is_finished(result.response):
+                    yield result.id, result.response
+                elif isinstance(result.error, YumpuError):
+                    yield result.id, result.error.response
+                else:
+                    next_poll = now + self.interval(now - started)
+                    heapq.heappush(queue, (next_poll, result.id))